@@ -0,0 +1,69 @@
+"""Measures Sender throughput and backpressure against the fake Bot API.
+
+Usage: python benchmarks/delivery.py [--messages 2000] [--chats 200]
+           [--queue 10000] [--workers 8] [--rate 1000] [--chat-rate 10]
+           [--server-rate 1000] [--server-chat-rate 10] [--latency 0.005]
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from telebot import TeleBot  # noqa: E402
+
+from fakes.telegram import FakeTelegram  # noqa: E402
+from homework import use_bot_api  # noqa: E402
+from sender import Sender  # noqa: E402
+
+
+async def deliver(sender, messages, chats):
+    """Submits all messages at once and waits for the queue to drain."""
+    sender.start()
+    started = time.perf_counter()
+    for number in range(messages):
+        sender.send(number % chats, f'message {number}')
+    await sender.queue.join()
+    elapsed = time.perf_counter() - started
+    await sender.stop()
+    return elapsed
+
+
+def main():
+    """Prints delivery throughput and what the limits cost."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--messages', type=int, default=2000)
+    parser.add_argument('--chats', type=int, default=200)
+    parser.add_argument('--queue', type=int, default=10_000)
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--rate', type=float, default=1000)
+    parser.add_argument('--chat-rate', type=float, default=10)
+    parser.add_argument('--server-rate', type=float, default=1000)
+    parser.add_argument('--server-chat-rate', type=float, default=10)
+    parser.add_argument('--latency', type=float, default=0.005)
+    args = parser.parse_args()
+    logging.disable(logging.ERROR)
+    with FakeTelegram(
+        chat_rate=args.server_chat_rate, chat_burst=args.server_chat_rate,
+        global_rate=args.server_rate, latency=args.latency,
+    ) as telegram:
+        use_bot_api(telegram.url)
+        sender = Sender(
+            TeleBot('123:benchmark'), maxsize=args.queue,
+            workers=args.workers, global_rate=args.rate,
+            chat_rate=args.chat_rate,
+        )
+        elapsed = asyncio.run(deliver(sender, args.messages, args.chats))
+    stats = sender.stats()
+    print(f'{stats["sent"]} messages in {elapsed:.2f} s '
+          f'({stats["sent"] / elapsed:,.0f} messages/s)')
+    print(f'dropped by full queue: {stats["dropped"]}, '
+          f'429 answers: {telegram.throttled}, '
+          f'requests: {telegram.requests}')
+
+
+if __name__ == '__main__':
+    main()
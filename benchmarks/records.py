@@ -0,0 +1,65 @@
+"""Measures memory retained per homework: dicts versus Homework records.
+
+Usage: python benchmarks/records.py [ITEMS]
+"""
+import json
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from index import HomeworkIndex  # noqa: E402
+from schema import validate_answer  # noqa: E402
+from validator import make_answer  # noqa: E402
+
+
+def retained(build, content):
+    """Returns bytes still allocated by what build(content) returns."""
+    tracemalloc.start()
+    kept = build(content)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del kept
+    return size
+
+
+def dicts(content):
+    """Decoded homework dicts, as check_response returns them."""
+    return json.loads(content)['homeworks']
+
+
+def records(content):
+    """Homework records built by the validator."""
+    return validate_answer(json.loads(content))[0].homeworks
+
+
+def dict_index(content):
+    """Index filled from dicts: (status, date_updated) per homework."""
+    homeworks = json.loads(content)['homeworks']
+    index = HomeworkIndex(maxsize=len(homeworks))
+    index.diff(homeworks)
+    return index
+
+
+def record_index(content):
+    """Index filled from records: (status code, date_updated)."""
+    homeworks = validate_answer(json.loads(content))[0].homeworks
+    index = HomeworkIndex(maxsize=len(homeworks))
+    for homework in homeworks:
+        index.update((None, homework.id), homework.state)
+    return index
+
+
+def main():
+    """Prints bytes retained per homework by each representation."""
+    items = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    content = json.dumps(make_answer(items)).encode()
+    for build in (dicts, records, dict_index, record_index):
+        size = retained(build, content)
+        print(f'{build.__name__:12} {items} items: '
+              f'{size / items:8.1f} bytes per homework')
+
+
+if __name__ == '__main__':
+    main()
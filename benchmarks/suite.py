@@ -0,0 +1,331 @@
+"""Benchmark suite for the poll -> validate -> parse -> send pipeline.
+
+Measures check_response, parse_status, the compiled validator, a full
+main() cycle over N homeworks and an Engine cycle over N tenants, at
+every scale. Each case reports throughput, p50/p99 latency and peak
+traced memory. Results are written as JSON named after the commit.
+
+Usage:
+    python benchmarks/suite.py [--scales 1,100,10000,100000] [--output FILE]
+    python benchmarks/suite.py --compare BASE.json NEW.json [--threshold 0.1]
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from types import SimpleNamespace
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+import homework  # noqa: E402
+from engine import Engine  # noqa: E402
+from outbox import Outbox  # noqa: E402
+from schema import validate_answer  # noqa: E402
+from sender import Sender  # noqa: E402
+from storage import StateStore  # noqa: E402
+from tenants import Tenant  # noqa: E402
+from validator import make_answer  # noqa: E402
+
+RESULTS_DIR = os.path.join(BASE_DIR, 'benchmarks', 'results')
+SCALES = (1, 100, 10_000, 100_000)
+
+
+class Response:
+    """Canned 200 answer, decoded afresh on every json() call."""
+
+    status_code = 200
+
+    def __init__(self, data):
+        """Creates a response with `data` as its body."""
+        self.content = json.dumps(data).encode()
+        self.headers = {}
+
+    def json(self):
+        """Decodes the body."""
+        return json.loads(self.content)
+
+
+class NullBot:
+    """Accepts every message instantly."""
+
+    def __init__(self, *args, **kwargs):
+        """Accepts the TeleBot arguments."""
+        self.sent = 0
+
+    def send_message(self, chat_id=None, text=None, **kwargs):
+        """Counts the message and returns a stand-in Message."""
+        self.sent += 1
+        return SimpleNamespace(message_id=self.sent)
+
+
+class Pool:
+    """Answers each tenant in turn from two alternating answers."""
+
+    def __init__(self, answers):
+        """Creates a pool answering with `answers`."""
+        self.answers = [Response(answer) for answer in answers]
+        self.polls = {}
+
+    def get(self, url, headers=None, **kwargs):
+        """Returns the next answer for the requesting token."""
+        token = headers['Authorization']
+        polls = self.polls[token] = self.polls.get(token, -1) + 1
+        return self.answers[polls % 2]
+
+    def stats(self):
+        """No pool counters to report."""
+        return {}
+
+    def close(self):
+        """Nothing to close."""
+
+
+class Stop(Exception):
+    """Ends main() after the requested number of cycles."""
+
+
+def summarize(samples, items, peak):
+    """Returns the statistics of one case."""
+    samples = sorted(samples)
+    if len(samples) > 1:
+        percentiles = statistics.quantiles(samples, n=100, method='inclusive')
+        p50, p99 = percentiles[49], percentiles[98]
+    else:
+        p50 = p99 = samples[0]
+    mean = statistics.fmean(samples)
+    return {
+        'items': items,
+        'samples': len(samples),
+        'mean_ms': mean * 1000,
+        'p50_ms': p50 * 1000,
+        'p99_ms': p99 * 1000,
+        'throughput': items / mean if mean else None,
+        'peak_kib': peak / 1024,
+    }
+
+
+def traced_peak(run):
+    """Returns the peak memory traced while running a callable."""
+    tracemalloc.start()
+    try:
+        run()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def measure(run, items, repeat):
+    """Times repeated calls of a callable and traces one more."""
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        run()
+        samples.append(time.perf_counter() - started)
+    return summarize(samples, items, traced_peak(run))
+
+
+def answers(homeworks):
+    """Two answers in which every tenth homework changes status."""
+    return [make_answer(homeworks), make_answer(homeworks, poll=1)]
+
+
+def bench_check_response(scale, repeat):
+    """check_response on an answer with `scale` homeworks."""
+    answer = make_answer(scale)
+    return measure(lambda: homework.check_response(answer), scale, repeat)
+
+
+def bench_parse_status(scale, repeat):
+    """parse_status over `scale` homeworks."""
+    homeworks = make_answer(scale)['homeworks']
+    parse_status = homework.parse_status
+
+    def run():
+        for item in homeworks:
+            parse_status(item)
+    return measure(run, scale, repeat)
+
+
+def bench_validate(scale, repeat):
+    """The compiled validator on an answer with `scale` homeworks."""
+    answer = make_answer(scale)
+    return measure(lambda: validate_answer(answer), scale, repeat)
+
+
+def run_main(pool, cycles, on_cycle=None):
+    """Runs main() for a number of cycles, timing each of them."""
+    patched = {
+        'PRACTICUM_TOKEN': 'benchmark',
+        'TELEGRAM_TOKEN': 'benchmark',
+        'TELEGRAM_CHAT_ID': 1,
+        'SUBSCRIPTIONS_FILE': None,
+        'STATE_DB': ':memory:',
+        'TeleBot': NullBot,
+    }
+    saved = {name: getattr(homework, name) for name in patched}
+    get, sleep = homework.requests.get, homework.time.sleep
+    marks = [time.perf_counter()]
+
+    def tick(delay):
+        marks.append(time.perf_counter())
+        if len(marks) > cycles:
+            raise Stop
+
+    vars(homework).update(patched)
+    homework.requests.get = (
+        lambda url, headers=None, params=None, **kwargs:
+        pool.get(url, headers=homework.HEADERS)
+    )
+    homework.time.sleep = tick
+    try:
+        homework.main()
+    except Stop:
+        pass
+    finally:
+        vars(homework).update(saved)
+        homework.requests.get, homework.time.sleep = get, sleep
+    return [end - start for start, end in zip(marks, marks[1:])]
+
+
+def bench_main_cycle(scale, repeat):
+    """A main() cycle: poll, check, diff, parse, outbox and send."""
+    data = answers(scale)
+    durations = run_main(Pool(data), repeat + 1)
+    peak = traced_peak(lambda: run_main(Pool(data), 2))
+    # The first cycle reports every homework as new.
+    return summarize(durations[1:], scale, peak)
+
+
+def bench_engine_cycle(scale, repeat):
+    """An Engine cycle over `scale` tenants with two homeworks each."""
+    data = answers(2)
+
+    async def cycles(count):
+        tenants = [Tenant(f'token{number}', number) for number in range(scale)]
+        engine = Engine(
+            NullBot(), tenants, pool=Pool(data), store=StateStore(':memory:')
+        )
+        engine.sender = Sender(
+            engine.bot, maxsize=4 * scale, global_rate=1e9, chat_rate=1e9,
+            outbox=Outbox(engine.store),
+        )
+        engine.sender.start()
+        durations = []
+        for _ in range(count):
+            started = time.perf_counter()
+            await engine.run_cycle()
+            await engine.sender.queue.join()
+            durations.append(time.perf_counter() - started)
+        await engine.sender.stop()
+        engine.store.close()
+        return durations
+
+    durations = asyncio.run(cycles(repeat + 1))
+    peak = traced_peak(lambda: asyncio.run(cycles(2)))
+    return summarize(durations[1:], scale, peak)
+
+
+CASES = {
+    'check_response': (bench_check_response, 1_000_000),
+    'parse_status': (bench_parse_status, 1_000_000),
+    'validate_answer': (bench_validate, 1_000_000),
+    'main_cycle': (bench_main_cycle, 100_000),
+    'engine_cycle': (bench_engine_cycle, 100_000),
+}
+
+
+def commit():
+    """Returns the current commit, marked dirty if the tree is."""
+    def git(*args):
+        return subprocess.run(
+            ['git', *args], cwd=BASE_DIR, capture_output=True, text=True,
+        ).stdout.strip()
+    head = git('rev-parse', '--short', 'HEAD') or 'unknown'
+    if git('status', '--porcelain', '--untracked-files=no'):
+        head += '-dirty'
+    return head
+
+
+def run(scales, cases, max_repeat):
+    """Runs the cases at every scale and returns the report."""
+    results = []
+    for name in cases:
+        bench, budget = CASES[name]
+        for scale in scales:
+            repeat = max(3, min(max_repeat, budget // scale))
+            result = {'case': name, 'scale': scale, **bench(scale, repeat)}
+            results.append(result)
+            print(f'{name:16} {scale:>7}: p50 {result["p50_ms"]:10.3f} ms  '
+                  f'p99 {result["p99_ms"]:10.3f} ms  '
+                  f'{result["throughput"]:>14,.0f} items/s  '
+                  f'peak {result["peak_kib"]:>10,.0f} KiB', flush=True)
+    return {
+        'commit': commit(),
+        'created': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'results': results,
+    }
+
+
+def compare(base, new, threshold):
+    """Prints p50 and peak memory changes, returns the regressions."""
+    with open(base) as file:
+        before = {
+            (result['case'], result['scale']): result
+            for result in json.load(file)['results']
+        }
+    with open(new) as file:
+        after = json.load(file)['results']
+    regressions = 0
+    for result in after:
+        old = before.get((result['case'], result['scale']))
+        if old is None:
+            continue
+        time_change = result['p50_ms'] / old['p50_ms'] - 1
+        memory_change = result['peak_kib'] / max(old['peak_kib'], 1e-9) - 1
+        regressed = time_change > threshold or memory_change > threshold
+        regressions += regressed
+        print(f'{result["case"]:16} {result["scale"]:>7}: '
+              f'p50 {time_change:+7.1%}  peak {memory_change:+7.1%}'
+              f'{"  REGRESSION" if regressed else ""}')
+    return regressions
+
+
+def main():
+    """Runs the suite or compares two reports."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scales', default=','.join(map(str, SCALES)))
+    parser.add_argument('--cases', default=','.join(CASES))
+    parser.add_argument('--repeat', type=int, default=1000,
+                        help='upper bound of samples per case')
+    parser.add_argument('--output', help='defaults to results/COMMIT.json')
+    parser.add_argument('--compare', nargs=2, metavar=('BASE', 'NEW'))
+    parser.add_argument('--threshold', type=float, default=0.1)
+    args = parser.parse_args()
+    if args.compare:
+        sys.exit(1 if compare(*args.compare, args.threshold) else 0)
+    logging.disable(logging.CRITICAL)
+    report = run(
+        [int(scale) for scale in args.scales.split(',')],
+        args.cases.split(','), args.repeat,
+    )
+    output = args.output or os.path.join(
+        RESULTS_DIR, f'{report["commit"]}.json'
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as file:
+        json.dump(report, file, indent=2)
+    print(f'Results written to {output}')
+
+
+if __name__ == '__main__':
+    main()
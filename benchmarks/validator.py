@@ -0,0 +1,86 @@
+"""Compares the compiled validator with check_response + parse_changes.
+
+Each variant validates an answer, diffs it against a primed homework
+index and renders messages for the homeworks that changed, the way a poll
+does. Every tenth homework changes between polls.
+
+Usage: python benchmarks/validator.py [ITEMS] [REPEAT]
+"""
+import itertools
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from constants import HOMEWORK_VERDICTS  # noqa: E402
+from engine import record_date  # noqa: E402
+from homework import check_response, parse_changes, render_status  # noqa
+from index import HomeworkIndex  # noqa: E402
+from schema import validate_answer  # noqa: E402
+
+STATUSES = list(HOMEWORK_VERDICTS)
+
+
+def make_answer(items, poll=0):
+    """Builds an API answer with the given number of homeworks."""
+    return {
+        'homeworks': [
+            {
+                'id': number,
+                'homework_name': f'user__hw{number}.zip',
+                'status': STATUSES[(number + (number % 10 == 0) * poll) % 3],
+                'date_updated': f'2021-04-{number % 28 + 1:02}T10:00:00Z',
+                'reviewer_comment': 'Ok',
+                'lesson_name': 'Final project',
+            }
+            for number in range(items)
+        ],
+        'current_date': 1618000000,
+    }
+
+
+def functions(answer, index):
+    """The main() path: check the answer, render the changed homeworks."""
+    return parse_changes(check_response(answer), index)[0]
+
+
+def compiled(answer, index):
+    """The engine path: records are diffed in one batch and rendered."""
+    homeworks = validate_answer(answer)[0].homeworks
+    flags = index.update_all([
+        ((None, homework.id), homework.state) for homework in homeworks
+    ])
+    changed = list(itertools.compress(homeworks, flags))
+    changed.sort(key=record_date)
+    return [render_status(homework) for homework in changed]
+
+
+def measure(function, answers, repeat):
+    """Returns the best time of a poll alternating between two answers."""
+    index = HomeworkIndex(maxsize=len(answers[0]['homeworks']))
+    function(answers[1], index)
+    polls = iter(answers * repeat)
+    return min(timeit.repeat(
+        lambda: function(next(polls), index), number=1, repeat=repeat
+    ))
+
+
+def main():
+    """Prints the best time of each variant."""
+    items = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    answers = [make_answer(items), make_answer(items, poll=1)]
+    for name, function in (('functions', functions), ('compiled', compiled)):
+        best = measure(function, answers, repeat)
+        print(f'{name:10} {items} items: {best * 1000:8.2f} ms '
+              f'({items / best:,.0f} items/s)')
+    best = min(timeit.repeat(
+        lambda: validate_answer(answers[0]), number=1, repeat=repeat
+    ))
+    print(f'{"validate":10} {items} items: {best * 1000:8.2f} ms '
+          f'({items / best:,.0f} items/s)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,148 @@
+import logging
+import threading
+import time
+from http import HTTPStatus
+
+import requests
+from telebot.apihelper import ApiException, ApiTelegramException
+
+from constants import (
+    BREAKER_FAILURES,
+    BREAKER_RESET_TIMEOUT,
+    BREAKER_TRIAL_CALLS,
+)
+from exceptions import CircuitOpen
+from metrics import BREAKER_STATE
+
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half-open'
+STATE_VALUES = {CLOSED: 0, OPEN: 1, HALF_OPEN: 2}
+
+logger = logging.getLogger(__name__)
+
+
+def telegram_outage(error):
+    """Whether a Bot API error means Telegram itself is failing."""
+    if isinstance(error, ApiTelegramException):
+        return error.error_code >= HTTPStatus.INTERNAL_SERVER_ERROR
+    return isinstance(error, (ApiException, requests.RequestException))
+
+
+class CircuitBreaker:
+    """Fails calls to a dependency fast while it keeps failing.
+
+    Closed: calls go through; `failures` failures in a row open the
+    circuit. Open: `allow` raises CircuitOpen without calling anything.
+    After `reset_timeout` seconds the circuit is half-open and lets
+    `trial_calls` calls through: a success closes it, a failure opens it
+    again. Shared by worker threads, so transitions take a lock.
+    """
+
+    def __init__(
+        self, name, failures=BREAKER_FAILURES,
+        reset_timeout=BREAKER_RESET_TIMEOUT, trial_calls=BREAKER_TRIAL_CALLS,
+        is_failure=None, clock=time.monotonic,
+    ):
+        """Creates a closed breaker for dependency `name`."""
+        self.name = name
+        self.threshold = failures
+        self.reset_timeout = reset_timeout
+        self.trial_calls = trial_calls
+        self.is_failure = is_failure
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.failures = 0
+        self.trials = 0
+        self.opened_at = 0.0
+        self.current = CLOSED
+        BREAKER_STATE.labels(name).set_function(self.value)
+
+    def refresh(self):
+        """Moves an open circuit to half-open once its timeout is over."""
+        if (
+            self.current == OPEN
+            and self.clock() - self.opened_at >= self.reset_timeout
+        ):
+            self.current = HALF_OPEN
+            self.trials = 0
+
+    @property
+    def state(self):
+        """Current state: closed, open or half-open."""
+        with self.lock:
+            self.refresh()
+            return self.current
+
+    def value(self):
+        """State as the number exported by BREAKER_STATE."""
+        return STATE_VALUES[self.state]
+
+    def allow(self):
+        """Raises CircuitOpen unless a call may be made now."""
+        with self.lock:
+            self.refresh()
+            if self.current == CLOSED:
+                return
+            if self.current == HALF_OPEN and self.trials < self.trial_calls:
+                self.trials += 1
+                return
+        raise CircuitOpen(f'{self.name} circuit is open')
+
+    def success(self):
+        """Records a successful call, closing the circuit."""
+        with self.lock:
+            self.failures = 0
+            if self.current == CLOSED:
+                return
+            self.current = CLOSED
+        logger.info(f'{self.name} circuit closed.')
+
+    def failure(self):
+        """Records a failed call, opening the circuit past the threshold."""
+        with self.lock:
+            self.failures += 1
+            if self.current == OPEN or (
+                self.current == CLOSED and self.failures < self.threshold
+            ):
+                return
+            self.current = OPEN
+            self.opened_at = self.clock()
+        logger.warning(
+            f'{self.name} circuit opened after {self.failures} failures, '
+            f'next attempt in {self.reset_timeout:.0f} s.'
+        )
+
+    def reset(self):
+        """Closes the circuit and forgets past failures."""
+        with self.lock:
+            self.current = CLOSED
+            self.failures = 0
+            self.trials = 0
+
+    def record(self, failed):
+        """Records the outcome of a call."""
+        if failed:
+            self.failure()
+        else:
+            self.success()
+
+    def call(self, function, *args, **kwargs):
+        """Calls `function` through the breaker.
+
+        Exceptions are re-raised; only those `is_failure` accepts count
+        as failures, the rest mean the dependency did answer.
+        """
+        self.allow()
+        try:
+            result = function(*args, **kwargs)
+        except Exception as error:
+            self.record(self.is_failure is None or self.is_failure(error))
+            raise
+        self.success()
+        return result
+
+
+PRACTICUM_BREAKER = CircuitBreaker('practicum')
+TELEGRAM_BREAKER = CircuitBreaker('telegram', is_failure=telegram_outage)
@@ -0,0 +1,82 @@
+import hashlib
+import re
+
+
+CURRENT_DATE_PATTERN = re.compile(rb'"current_date"\s*:\s*-?\d+')
+
+
+def body_digest(content):
+    """Hashes a raw response body, ignoring the ever-changing current_date."""
+    return hashlib.blake2b(
+        CURRENT_DATE_PATTERN.sub(b'', content), digest_size=16
+    ).digest()
+
+
+class CacheEntry:
+    """Validators and body digest of the last response for a cursor."""
+
+    __slots__ = ('timestamp', 'etag', 'last_modified', 'digest')
+
+    def __init__(self, timestamp, etag, last_modified, digest):
+        """Stores the validators and digest of a response."""
+        self.timestamp = timestamp
+        self.etag = etag
+        self.last_modified = last_modified
+        self.digest = digest
+
+
+class ResponseCache:
+    """Remembers the last response per tenant to skip unchanged payloads.
+
+    One entry is kept per tenant. Its body digest is compared whatever the
+    cursor (`from_date`), since the cursor moves to `current_date` after
+    every decoded answer; the ETag and Last-Modified validators are only
+    sent for the cursor they were stored with.
+    """
+
+    def __init__(self):
+        """Creates an empty cache."""
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+
+    def validators(self, key, timestamp):
+        """Returns conditional request headers for the cursor."""
+        entry = self.entries.get(key)
+        if entry is None or entry.timestamp != timestamp:
+            return {}
+        headers = {}
+        if entry.etag:
+            headers['If-None-Match'] = entry.etag
+        if entry.last_modified:
+            headers['If-Modified-Since'] = entry.last_modified
+        return headers
+
+    def not_modified(self):
+        """Counts a 304 Not Modified answer as a hit."""
+        self.hits += 1
+
+    def unchanged(self, key, timestamp, response):
+        """Checks the body against the last one, remembering the new one."""
+        digest = body_digest(response.content)
+        entry = self.entries.get(key)
+        hit = entry is not None and entry.digest == digest
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+        self.entries[key] = CacheEntry(
+            timestamp,
+            response.headers.get('ETag'),
+            response.headers.get('Last-Modified'),
+            digest,
+        )
+        return hit
+
+    def stats(self):
+        """Returns hit and miss counters."""
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'entries': len(self.entries),
+        }
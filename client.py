@@ -0,0 +1,93 @@
+from http import HTTPStatus
+
+import requests
+
+from breaker import PRACTICUM_BREAKER
+from constants import ENDPOINT, REQUEST_TIMEOUT
+from decoders import Decoder
+from exceptions import EndpointNotAvailable, UnknownHomeworkStatus
+from tracing import annotate
+
+
+class PracticumClient:
+    """Fetches homework statuses for tenants over a shared session.
+
+    With a `ResponseCache`, conditional requests are sent and `fetch`
+    returns None instead of decoding a payload that has not changed since
+    the previous poll for the same cursor.
+
+    `stream` skips the cache and leaves the body unread, so that it can be
+    decoded incrementally from `response.raw`.
+
+    Bodies are decoded from `response.content` bytes by a pluggable
+    `Decoder`, skipping the bytes to str copy of `response.json()`.
+    """
+
+    def __init__(self, session=requests, cache=None, decoder=None):
+        """Creates a client over `session`."""
+        self.session = session
+        self.cache = cache
+        self.decoder = decoder or Decoder()
+
+    def request(self, tenant, stream=False):
+        """Makes a request to endpoint for the tenant's cursor.
+
+        Goes through PRACTICUM_BREAKER: while the API keeps failing, this
+        raises CircuitOpen instead of waiting for another timeout.
+        """
+        headers = tenant.headers
+        if self.cache is not None and not stream:
+            validators = self.cache.validators(tenant.token, tenant.timestamp)
+            if validators:
+                headers = {**headers, **validators}
+        PRACTICUM_BREAKER.allow()
+        try:
+            response = self.session.get(
+                ENDPOINT,
+                params={'from_date': tenant.timestamp},
+                headers=headers,
+                stream=stream,
+                timeout=REQUEST_TIMEOUT
+            )
+        except requests.RequestException as error:
+            PRACTICUM_BREAKER.failure()
+            raise EndpointNotAvailable(
+                f'Endpoint is not available: {error}'
+            )
+        PRACTICUM_BREAKER.record(
+            response.status_code >= HTTPStatus.INTERNAL_SERVER_ERROR
+        )
+        return response
+
+    def fetch(self, tenant):
+        """Returns the decoded API answer, or None if it is unchanged."""
+        cache = self.cache
+        response = self.request(tenant)
+        annotate('http.status_code', response.status_code)
+        if (
+            cache is not None
+            and response.status_code == HTTPStatus.NOT_MODIFIED
+        ):
+            cache.not_modified()
+            return None
+        if response.status_code != HTTPStatus.OK:
+            raise UnknownHomeworkStatus(
+                f'Not succsess status API response: {response.status_code}')
+        if cache is not None and cache.unchanged(
+            tenant.token, tenant.timestamp, response
+        ):
+            annotate('cache', 'unchanged')
+            return None
+        annotate('payload.bytes', len(response.content))
+        return self.decoder.decode(response.content)
+
+    def stream(self, tenant):
+        """Returns a response whose body is left to be read from `raw`."""
+        response = self.request(tenant, stream=True)
+        annotate('http.status_code', response.status_code)
+        if response.status_code != HTTPStatus.OK:
+            response.close()
+            raise UnknownHomeworkStatus(
+                f'Not succsess status API response: {response.status_code}')
+        response.raw.decode_content = True
+        return response
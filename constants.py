@@ -8,6 +8,41 @@ load_dotenv()
 PRACTICUM_TOKEN = os.getenv('PRACTICUM_TOKEN')
 TELEGRAM_TOKEN = os.getenv('TELEGRAM_TOKEN')
 TELEGRAM_CHAT_ID = os.getenv('TELEGRAM_CHAT_ID')
+SUBSCRIPTIONS_FILE = os.getenv('SUBSCRIPTIONS_FILE')
+STATE_DB = os.getenv('STATE_DB', 'homework_bot.sqlite3')
+INDEX_MAXSIZE = int(os.getenv('INDEX_MAXSIZE', 100_000))
+SEND_QUEUE_SIZE = int(os.getenv('SEND_QUEUE_SIZE', 10_000))
+SEND_WORKERS = int(os.getenv('SEND_WORKERS', 8))
+TELEGRAM_GLOBAL_RATE = float(os.getenv('TELEGRAM_GLOBAL_RATE', 30))
+TELEGRAM_CHAT_RATE = float(os.getenv('TELEGRAM_CHAT_RATE', 1))
+EDIT_IN_PLACE = os.getenv('EDIT_IN_PLACE', '').lower() in ('1', 'true', 'yes')
+JSON_BACKEND = os.getenv('JSON_BACKEND', 'auto')
+TELEGRAM_API_URL = os.getenv('TELEGRAM_API_URL')
+METRICS_HOST = os.getenv('METRICS_HOST', '127.0.0.1')
+METRICS_PORT = int(os.getenv('METRICS_PORT', 0))
+TRACE_SAMPLE_RATE = float(os.getenv('TRACE_SAMPLE_RATE', 0))
+TRACE_SLOW_THRESHOLD = (
+    float(os.getenv('TRACE_SLOW_THRESHOLD'))
+    if os.getenv('TRACE_SLOW_THRESHOLD') else None
+)
+TRACE_FILE = os.getenv('TRACE_FILE')
+TRACE_BUFFER_SIZE = int(os.getenv('TRACE_BUFFER_SIZE', 10_000))
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').upper()
+LOG_FORMAT = os.getenv('LOG_FORMAT', 'text')
+LOG_DEBUG_SAMPLE_RATE = float(os.getenv('LOG_DEBUG_SAMPLE_RATE', 1))
+PROFILE_DIR = os.getenv('PROFILE_DIR')
+PROFILE_CYCLES = int(os.getenv('PROFILE_CYCLES', 10))
+PROFILE_TOP = int(os.getenv('PROFILE_TOP', 50))
+STREAM_RESPONSES = (
+    os.getenv('STREAM_RESPONSES', '').lower() in ('1', 'true', 'yes')
+)
+STREAM_CHUNK_SIZE = int(os.getenv('STREAM_CHUNK_SIZE', 16384))
+DIGEST_WINDOW = float(os.getenv('DIGEST_WINDOW', 0))
+DIGEST_MAX_LENGTH = int(os.getenv('DIGEST_MAX_LENGTH', 4096))
+OUTBOX_DRAIN_INTERVAL = float(os.getenv('OUTBOX_DRAIN_INTERVAL', 5))
+OUTBOX_MIN_BACKOFF = float(os.getenv('OUTBOX_MIN_BACKOFF', 10))
+OUTBOX_MAX_BACKOFF = float(os.getenv('OUTBOX_MAX_BACKOFF', 3600))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv('OUTBOX_MAX_ATTEMPTS', 20))
 
 TOKENS = {
     ('PRACTICUM_TOKEN', PRACTICUM_TOKEN),
@@ -16,7 +51,19 @@ TOKENS = {
 }
 
 RETRY_PERIOD = 600
-ENDPOINT = 'https://practicum.yandex.ru/api/user_api/homework_statuses/'
+MIN_POLL_INTERVAL = int(os.getenv('MIN_POLL_INTERVAL', 60))
+MAX_POLL_INTERVAL = int(os.getenv('MAX_POLL_INTERVAL', 1800))
+MAX_CONCURRENCY = int(os.getenv('MAX_CONCURRENCY', 64))
+POOL_MAXSIZE = int(os.getenv('POOL_MAXSIZE', MAX_CONCURRENCY))
+POOL_IDLE_TIMEOUT = int(os.getenv('POOL_IDLE_TIMEOUT', 60))
+REQUEST_TIMEOUT = float(os.getenv('REQUEST_TIMEOUT', 10))
+BREAKER_FAILURES = int(os.getenv('BREAKER_FAILURES', 5))
+BREAKER_RESET_TIMEOUT = float(os.getenv('BREAKER_RESET_TIMEOUT', 60))
+BREAKER_TRIAL_CALLS = int(os.getenv('BREAKER_TRIAL_CALLS', 1))
+ENDPOINT = os.getenv(
+    'PRACTICUM_ENDPOINT',
+    'https://practicum.yandex.ru/api/user_api/homework_statuses/'
+)
 
 HOMEWORK_VERDICTS = {
     'approved': 'Работа проверена: ревьюеру всё понравилось. Ура!',
@@ -0,0 +1,70 @@
+import json
+
+from constants import JSON_BACKEND
+from exceptions import JsonError
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+
+def stdlib_backend():
+    """Returns the standard library decoder, which also accepts bytes."""
+    return json.loads, (ValueError,)
+
+
+def orjson_backend():
+    """Returns the orjson decoder if it is installed."""
+    if orjson is None:
+        return None
+    return orjson.loads, (orjson.JSONDecodeError,)
+
+
+def msgspec_backend():
+    """Returns the msgspec decoder if it is installed."""
+    if msgspec is None:
+        return None
+    return msgspec.json.Decoder().decode, (msgspec.DecodeError,)
+
+
+BACKENDS = {
+    'orjson': orjson_backend,
+    'msgspec': msgspec_backend,
+    'json': stdlib_backend,
+}
+AUTO_ORDER = ('orjson', 'msgspec', 'json')
+
+
+class Decoder:
+    """JSON decoder working directly on raw response bytes.
+
+    `backend='auto'` picks the fastest installed library (orjson, then
+    msgspec) and falls back to the standard `json` module. Every decode
+    error is reported as `JsonError`.
+    """
+
+    def __init__(self, backend=JSON_BACKEND):
+        """Picks `backend`, or the first installed one for `auto`."""
+        names = AUTO_ORDER if backend == 'auto' else (backend,)
+        for name in names:
+            if name not in BACKENDS:
+                raise ValueError(f'Unknown JSON backend: {name}')
+            found = BACKENDS[name]()
+            if found is not None:
+                self.name = name
+                self.loads, self.errors = found
+                return
+        raise ImportError(f'JSON backend {backend} is not installed')
+
+    def decode(self, content):
+        """Decodes bytes into Python objects."""
+        try:
+            return self.loads(content)
+        except self.errors as error:
+            raise JsonError(f'JSON decode error: {error}')
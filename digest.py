@@ -0,0 +1,109 @@
+import time
+
+from constants import DIGEST_MAX_LENGTH, DIGEST_WINDOW
+
+
+SEPARATOR = '\n\n'
+
+
+def counter(count):
+    """Returns the suffix marking a message repeated `count` times."""
+    return '' if count == 1 else f' (×{count})'
+
+
+def render(texts):
+    """Joins messages, collapsing repeats into one line with a counter."""
+    return SEPARATOR.join(
+        f'{text}{counter(count)}' for text, count in texts.items()
+    )
+
+
+class Batch:
+    """Messages collected for one chat since `opened`."""
+
+    __slots__ = ('opened', 'texts', 'length')
+
+    def __init__(self, opened):
+        """Creates an empty batch opened at `opened`."""
+        self.opened = opened
+        self.texts = {}
+        self.length = 0
+
+    def growth(self, text):
+        """Returns how much longer the rendered digest gets with `text`."""
+        count = self.texts.get(text)
+        if count:
+            return len(counter(count + 1)) - len(counter(count))
+        return len(text) + (len(SEPARATOR) if self.texts else 0)
+
+    def add(self, text):
+        """Adds a message to the batch."""
+        self.length += self.growth(text)
+        self.texts[text] = self.texts.get(text, 0) + 1
+
+
+class Digest:
+    """Coalesces messages for each chat into one message per window.
+
+    The first message for a chat opens a window of `window` seconds; all
+    messages that arrive before it closes are sent together. A digest is
+    flushed early when adding a message would exceed `max_length`
+    characters (Telegram's message limit by default).
+    """
+
+    def __init__(
+        self, window=DIGEST_WINDOW, max_length=DIGEST_MAX_LENGTH,
+        clock=time.monotonic,
+    ):
+        """Creates a digest without pending batches."""
+        self.window = window
+        self.max_length = max_length
+        self.clock = clock
+        self.batches = {}
+
+    def add(self, chat_id, text):
+        """Adds a message, returns digests that must be sent right away."""
+        ready = []
+        batch = self.batches.get(chat_id)
+        if (
+            batch is not None
+            and batch.length + batch.growth(text) > self.max_length
+        ):
+            ready.append((chat_id, render(batch.texts)))
+            batch = None
+        if batch is None:
+            batch = self.batches[chat_id] = Batch(self.clock())
+        batch.add(text)
+        return ready
+
+    def pending(self, chat_id):
+        """Whether messages for the chat are waiting to be sent."""
+        return chat_id in self.batches
+
+    def due(self):
+        """Returns and forgets digests whose window has closed."""
+        deadline = self.clock() - self.window
+        closed = [
+            chat_id for chat_id, batch in self.batches.items()
+            if batch.opened <= deadline
+        ]
+        return [
+            (chat_id, render(self.batches.pop(chat_id).texts))
+            for chat_id in closed
+        ]
+
+    def flush(self):
+        """Returns and forgets all pending digests."""
+        ready = [
+            (chat_id, render(batch.texts))
+            for chat_id, batch in self.batches.items()
+        ]
+        self.batches.clear()
+        return ready
+
+    def delay(self):
+        """Returns seconds until the earliest window closes."""
+        if not self.batches:
+            return self.window
+        opened = min(batch.opened for batch in self.batches.values())
+        return max(opened + self.window - self.clock(), 0)
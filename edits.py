@@ -0,0 +1,48 @@
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS message_ids (
+    chat_id TEXT NOT NULL,
+    homework_id TEXT NOT NULL,
+    message_id INTEGER NOT NULL,
+    PRIMARY KEY (chat_id, homework_id)
+)
+'''
+
+NOT_MODIFIED = 'message is not modified'
+
+
+class MessageIds:
+    """Telegram message_id of the notification sent for each homework.
+
+    Kept in memory for lookups and written through to the StateStore
+    database, so edits keep working after a restart.
+    """
+
+    def __init__(self, store):
+        """Loads the stored message ids."""
+        self.connection = store.connection
+        self.connection.execute(SCHEMA)
+        self.ids = {
+            (chat_id, homework_id): message_id
+            for chat_id, homework_id, message_id
+            in self.connection.execute('SELECT * FROM message_ids')
+        }
+
+    def __len__(self):
+        """Returns the number of stored message ids."""
+        return len(self.ids)
+
+    def get(self, chat_id, homework_id):
+        """Returns the message_id to edit, or None."""
+        return self.ids.get((str(chat_id), str(homework_id)))
+
+    def set(self, chat_id, homework_id, message_id):
+        """Remembers the message sent for a homework."""
+        key = (str(chat_id), str(homework_id))
+        if self.ids.get(key) == message_id:
+            return
+        self.ids[key] = message_id
+        with self.connection:
+            self.connection.execute(
+                'INSERT OR REPLACE INTO message_ids VALUES (?, ?, ?)',
+                (*key, message_id)
+            )
@@ -0,0 +1,406 @@
+import asyncio
+import itertools
+import json
+import logging
+import signal
+import time
+
+from cache import ResponseCache
+from client import PracticumClient
+from constants import (
+    DIGEST_WINDOW,
+    EDIT_IN_PLACE,
+    MAX_CONCURRENCY,
+    STREAM_RESPONSES,
+)
+from digest import Digest
+from edits import MessageIds
+from exceptions import (
+    CircuitOpen,
+    CurrentDateStatus,
+    JsonError,
+    ValidationError,
+)
+from homework import render_status
+from index import HomeworkIndex
+from metrics import (
+    CYCLE_OVERRUN,
+    CYCLE_SECONDS,
+    MISSED_DEADLINES,
+    Stages,
+)
+from outbox import Outbox
+from pool import ConnectionPool
+from profiling import PROFILER, ProfiledExecutor
+from schema import check_answer, validate_homework
+from scheduler import PollScheduler
+from sender import Sender
+from storage import StateStore
+from streaming import StreamedAnswer
+from tenants import load_tenants
+
+
+logger = logging.getLogger(__name__)
+
+
+def record_date(homework):
+    """Returns the date_updated of a homework record, '' if unknown."""
+    return homework.date_updated or ''
+
+
+class Engine:
+    """Polls many tenants from one process on a single event loop."""
+
+    def __init__(
+        self, bot, tenants, concurrency=MAX_CONCURRENCY, pool=None,
+        loader=None, store=None, streaming=STREAM_RESPONSES,
+    ):
+        """Creates an engine for `tenants` sending through `bot`."""
+        self.bot = bot
+        self.tenants = tenants
+        self.loader = loader
+        self.concurrency = concurrency
+        self.streaming = streaming
+        self.limit = asyncio.Semaphore(concurrency)
+        self.pool = pool or ConnectionPool(maxsize=concurrency)
+        self.cache = ResponseCache()
+        self.client = PracticumClient(self.pool, self.cache)
+        self.scheduler = PollScheduler()
+        self.index = HomeworkIndex()
+        self.store = store or StateStore()
+        self.sender = Sender(
+            bot, outbox=Outbox(self.store),
+            message_ids=MessageIds(self.store) if EDIT_IN_PLACE else None,
+        )
+        self.digest = Digest() if DIGEST_WINDOW > 0 else None
+        for tenant in tenants:
+            self.store.restore(tenant)
+        self.cycle_overrun = 0.0
+        self.running = False
+        self.reload_requested = False
+        self.wakeup = asyncio.Event()
+
+    async def fetch_answer(self, tenant, stages):
+        """Requests the API for a tenant without blocking the event loop."""
+        stages.enter('wait')
+        async with self.limit:
+            stages.enter('request')
+            return await asyncio.to_thread(self.client.fetch, tenant)
+
+    async def fetch_messages(self, tenant, stages):
+        """Fetches the whole answer and renders messages for changes.
+
+        Invalid homeworks are left out and reported, the valid ones are
+        still notified and the cursor moves on.
+        """
+        response = await self.fetch_answer(tenant, stages)
+        stages.enter('parse')
+        if response is None:
+            logger.debug(f'Unchanged API answer for {tenant}.')
+            return []
+        answer, errors = check_answer(response)
+        tenant.timestamp = answer.current_date
+        homeworks = answer.homeworks
+        stages.span.set('items', len(homeworks))
+        messages = []
+        if homeworks:
+            tenant.status = max(homeworks, key=record_date).status
+            token = tenant.token
+            flags = self.index.update_all([
+                ((token, homework.id), homework.state)
+                for homework in homeworks
+            ])
+            changed = list(itertools.compress(homeworks, flags))
+            changed.sort(key=record_date)
+            messages = [
+                (homework.id, render_status(homework)) for homework in changed
+            ]
+        elif not errors:
+            logger.debug(f'No new homeworks statuses for {tenant}.')
+        stages.span.set('changed', len(messages))
+        if errors:
+            messages += self.report(tenant, stages, ValidationError(errors))
+        return messages
+
+    def collect_stream(self, tenant):
+        """Decodes an answer item by item, keeping only rendered changes.
+
+        Runs in a worker thread. Returns the top-level fields, the status
+        of the newest homework, (date_updated, key, state, message) for
+        every homework that differs from the index and the violations of
+        the invalid homeworks, which are skipped.
+        """
+        index = self.index
+        newest = ('', None)
+        changes = []
+        errors = []
+        with self.client.stream(tenant) as response:
+            answer = StreamedAnswer(response.raw)
+            try:
+                for number, item in enumerate(answer):
+                    try:
+                        homework, _ = validate_homework(item)
+                    except ValidationError as error:
+                        path = f'response.homeworks[{number}]'
+                        errors.extend(
+                            message.replace('homework', path, 1)
+                            for message in error.errors
+                        )
+                        continue
+                    date_updated = record_date(homework)
+                    if date_updated >= newest[0]:
+                        newest = (date_updated, homework.status)
+                    key = (tenant.token, homework.id)
+                    state = homework.state
+                    if index.lookup(key) != state:
+                        changes.append((
+                            date_updated, key, state, render_status(homework)
+                        ))
+            except json.JSONDecodeError as error:
+                raise JsonError(f'JSON decode error: {error}')
+        return answer.fields, newest[1], changes, errors
+
+    async def stream_messages(self, tenant, stages):
+        """Streams the answer and renders messages for changes.
+
+        The index is only updated once the whole answer has been decoded
+        and its top-level fields validated.
+        """
+        stages.enter('wait')
+        async with self.limit:
+            stages.enter('stream')
+            fields, status, changes, errors = await asyncio.to_thread(
+                self.collect_stream, tenant
+            )
+        stages.enter('parse')
+        answer, _ = check_answer(fields)
+        tenant.timestamp = answer.current_date
+        if status is not None:
+            tenant.status = status
+        changes.sort(key=lambda change: change[0])
+        for _, key, state, _ in changes:
+            self.index.store(key, state)
+        stages.span.set('changed', len(changes))
+        messages = [(key[1], message) for _, key, _, message in changes]
+        if errors:
+            messages += self.report(tenant, stages, ValidationError(errors))
+        return messages
+
+    def report(self, tenant, stages, error):
+        """Logs a failure, returns the chat message unless just sent."""
+        stages.fail(error)
+        message = f'Bot program failure: {error}'
+        logger.error(f'{tenant}: {message}')
+        if message == tenant.previous_message:
+            return []
+        return [(None, message)]
+
+    async def poll_tenant(self, tenant):
+        """Polls the API for one tenant and notifies its chat."""
+        tenant.idle_polls += 1
+        stages = Stages('poll', chat_id=tenant.chat_id)
+        try:
+            if self.streaming:
+                messages = await self.stream_messages(tenant, stages)
+            else:
+                messages = await self.fetch_messages(tenant, stages)
+            if not messages:
+                return
+            tenant.idle_polls = 0
+        except CurrentDateStatus as error:
+            stages.fail(error)
+            logger.error(f'{tenant}: {error}')
+            return
+        except CircuitOpen as error:
+            stages.fail(error)
+            logger.debug(f'{tenant}: {error}')
+            return
+        except Exception as error:
+            messages = self.report(tenant, stages, error)
+            if not messages:
+                return
+        finally:
+            stages.finish()
+        for homework_id, message in messages:
+            self.notify(tenant.chat_id, message, homework_id)
+        tenant.previous_message = messages[-1][1]
+
+    def notify(self, chat_id, message, homework_id=None):
+        """Sends a message, coalescing it into the chat's digest if enabled.
+
+        In edit-in-place mode messages about a homework bypass the digest,
+        since they replace the message sent for that homework before.
+        """
+        edit = EDIT_IN_PLACE and homework_id is not None
+        if self.digest is None or edit:
+            self.sender.send(chat_id, message, homework_id)
+            return
+        for chat_id, text in self.digest.add(chat_id, message):
+            self.sender.send(chat_id, text)
+
+    def flush_digests(self, force=False):
+        """Sends digests whose window has closed, or all of them.
+
+        The state of the tenants of these chats is saved only now, once
+        their messages are in the outbox; see `save_tenants`.
+        """
+        ready = self.digest.flush() if force else self.digest.due()
+        if not ready:
+            return
+        for chat_id, text in ready:
+            self.sender.send(chat_id, text)
+        chats = {chat_id for chat_id, _ in ready}
+        for tenant in self.tenants:
+            if tenant.chat_id in chats:
+                self.store.save(tenant)
+        self.store.flush()
+
+    def save_tenants(self, tenants):
+        """Saves the state of polled tenants.
+
+        A tenant whose chat has a digest waiting keeps its previous saved
+        cursor: the digest lives only in memory, and after a crash the
+        homeworks in it must be polled and notified again.
+        """
+        digest = self.digest
+        for tenant in tenants:
+            if digest is None or not digest.pending(tenant.chat_id):
+                self.store.save(tenant)
+        self.store.flush()
+
+    async def flush_digests_forever(self):
+        """Sends digests as soon as their window closes."""
+        while True:
+            await asyncio.sleep(self.digest.delay())
+            self.flush_digests()
+
+    async def run_cycle(self, tenants=None):
+        """Polls the given (by default all) tenants concurrently."""
+        if tenants is None:
+            tenants = self.tenants
+        started = time.perf_counter()
+        await asyncio.gather(*(self.poll_tenant(tenant) for tenant in tenants))
+        self.save_tenants(tenants)
+        CYCLE_SECONDS.observe(time.perf_counter() - started)
+        PROFILER.cycle()
+        logger.info(
+            f'Connection pool: {self.pool.stats()}, '
+            f'response cache: {self.cache.stats()}, '
+            f'sender: {self.sender.stats()}'
+        )
+
+    async def run_due(self):
+        """Polls the tenants that are due and schedules their next polls."""
+        due = self.scheduler.pop_due()
+        if not due:
+            return
+        await self.run_cycle(due)
+        missed = self.scheduler.missed
+        self.cycle_overrun = max(
+            self.scheduler.reschedule(tenant) for tenant in due
+        )
+        CYCLE_OVERRUN.set(self.cycle_overrun)
+        MISSED_DEADLINES.inc(self.scheduler.missed - missed)
+        if self.cycle_overrun:
+            logger.warning(
+                f'Polling {len(due)} tenants overran the next deadline by '
+                f'{self.cycle_overrun:.3f} s: {self.scheduler.stats()}'
+            )
+
+    async def sleep(self, delay):
+        """Waits for `delay` seconds unless woken up by stop or reload."""
+        try:
+            await asyncio.wait_for(self.wakeup.wait(), delay)
+        except asyncio.TimeoutError:
+            pass
+        self.wakeup.clear()
+
+    def stop(self):
+        """Asks the serving loop to exit right away."""
+        self.running = False
+        self.wakeup.set()
+
+    def request_reload(self):
+        """Asks the serving loop to reload subscriptions right away."""
+        self.reload_requested = True
+        self.wakeup.set()
+
+    def reload(self):
+        """Re-reads subscriptions, keeping the state of unchanged ones."""
+        self.reload_requested = False
+        if self.loader is None:
+            return
+        try:
+            loaded = self.loader()
+        except Exception as error:
+            logger.error(f'Failed to reload subscriptions: {error}')
+            return
+        current = {
+            (tenant.token, tenant.chat_id): tenant for tenant in self.tenants
+        }
+        tenants = []
+        for tenant in loaded:
+            existing = current.pop((tenant.token, tenant.chat_id), None)
+            if existing is None:
+                self.store.restore(tenant)
+                self.scheduler.add(tenant)
+                existing = tenant
+            tenants.append(existing)
+        for removed in current.values():
+            self.scheduler.discard(removed)
+        self.tenants = tenants
+        logger.info(f'Subscriptions reloaded: {len(tenants)} tenants.')
+
+    def install_signal_handlers(self, loop):
+        """Stops on SIGTERM/SIGINT and reloads subscriptions on SIGHUP."""
+        handlers = {
+            'SIGTERM': self.stop,
+            'SIGINT': self.stop,
+            'SIGHUP': self.request_reload,
+        }
+        for name, handler in handlers.items():
+            try:
+                loop.add_signal_handler(getattr(signal, name), handler)
+            except (AttributeError, NotImplementedError, RuntimeError):
+                logger.debug(f'Signal {name} is not supported here.')
+
+    async def serve(self):
+        """Runs polling cycles on the current event loop until stopped."""
+        loop = asyncio.get_running_loop()
+        loop.set_default_executor(
+            ProfiledExecutor(max_workers=self.concurrency)
+        )
+        self.install_signal_handlers(loop)
+        logger.info(f'JSON backend: {self.client.decoder.name}.')
+        for tenant in self.tenants:
+            self.scheduler.add(tenant)
+        self.sender.start()
+        if self.digest is not None:
+            digests = asyncio.create_task(self.flush_digests_forever())
+        self.running = True
+        try:
+            while self.running:
+                if self.reload_requested:
+                    self.reload()
+                await self.run_due()
+                await self.sleep(self.scheduler.delay())
+        finally:
+            if self.digest is not None:
+                digests.cancel()
+                self.flush_digests(force=True)
+            await self.sender.stop()
+            self.store.close()
+            self.pool.close()
+
+
+def run_engine(bot, path, concurrency=MAX_CONCURRENCY):
+    """Polls every subscription in `path` on an adaptive schedule."""
+    def loader():
+        return load_tenants(path, int(time.time()))
+
+    tenants = loader()
+    logger.info(
+        f'Multi-tenant mode: {len(tenants)} subscriptions, '
+        f'concurrency {concurrency}.'
+    )
+    asyncio.run(Engine(bot, tenants, concurrency, loader=loader).serve())
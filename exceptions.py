@@ -26,3 +26,23 @@ class CurrentDateStatus(Exception):
     """Current date status error."""
 
     pass
+
+
+class ValidationError(Exception):
+    """API response does not match the schema."""
+
+    shown = 3
+
+    def __init__(self, errors):
+        """Creates the error from a list of violations."""
+        self.errors = errors
+        message = '; '.join(errors[:self.shown])
+        if len(errors) > self.shown:
+            message += f' (and {len(errors) - self.shown} more)'
+        super().__init__(message)
+
+
+class CircuitOpen(Exception):
+    """Dependency is failing, the call was not attempted."""
+
+    pass
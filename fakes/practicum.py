@@ -0,0 +1,219 @@
+"""Local stand-in for the Practicum homework_statuses API.
+
+Usage: python -m fakes.practicum [--port 8000] [--tenants 100]
+           [--homeworks 10] [--latency 0.05] [--error-rate 0.01]
+           [--churn 0.1]
+
+Point the bot at it with PRACTICUM_ENDPOINT set to the printed URL.
+"""
+import argparse
+import json
+import random
+import time
+from collections import deque
+from http import HTTPStatus
+from urllib.parse import parse_qs, urlsplit
+
+from constants import HOMEWORK_VERDICTS
+from fakes.server import FakeServer, JsonHandler
+
+
+PATH = '/api/user_api/homework_statuses/'
+NOT_AUTHENTICATED = {
+    'code': 'not_authenticated',
+    'message': 'Учетные данные не были предоставлены.',
+    'source': '__response__',
+}
+WRONG_FROM_DATE = {
+    'error': {'error': 'Wrong from_date format'},
+    'code': 'UnknownError',
+}
+
+
+def iso_date(timestamp):
+    """Formats a unix timestamp the way the API does."""
+    return time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(timestamp))
+
+
+class Handler(JsonHandler):
+    """Serves GET requests from the FakePracticum the server belongs to."""
+
+    def do_GET(self):
+        """Answers like the homework_statuses endpoint."""
+        url = urlsplit(self.path)
+        if url.path != PATH:
+            self.reply(HTTPStatus.NOT_FOUND, {'detail': 'Not found.'})
+            return
+        self.reply(*self.server.fake.answer(
+            self.headers.get('Authorization'), parse_qs(url.query)
+        ))
+
+
+class FakePracticum(FakeServer):
+    """Homework statuses API served from memory on localhost.
+
+    Homeworks are registered per OAuth token. Answers contain the
+    homeworks updated at or after `from_date` and the `current_date`
+    of the fake clock, like the real API. Requests without a known token
+    get 401 and a bad `from_date` gets 400.
+
+    Faults are injected with `latency` (seconds, or a (low, high) range),
+    `error_rate` (share of requests answered with `error_status`) and
+    `fail_next`, which queues the exact status and body of the next
+    answers. With `churn`, every request moves that share of the token's
+    homeworks to another status.
+    """
+
+    handler = Handler
+
+    def __init__(self, host='127.0.0.1', port=0, latency=0, error_rate=0,
+                 error_status=HTTPStatus.INTERNAL_SERVER_ERROR, churn=0,
+                 clock=time.time, seed=None):
+        """Creates the fake API without homeworks."""
+        super().__init__(host, port)
+        self.latency = latency
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.churn = churn
+        self.clock = clock
+        self.random = random.Random(seed)
+        self.homeworks = {}
+        self.failures = deque()
+        self.requests = 0
+        self.ids = 0
+
+    @property
+    def url(self):
+        """Endpoint to use instead of ENDPOINT."""
+        return f'{self.base_url}{PATH}'
+
+    def add_homework(self, token, status='reviewing', homework_name=None,
+                     updated=None):
+        """Registers a homework for a token and returns it."""
+        with self.lock:
+            self.ids += 1
+            homework = {
+                'id': self.ids,
+                'status': status,
+                'homework_name': homework_name or f'user__hw{self.ids}.zip',
+                'reviewer_comment': '',
+                'date_updated': '',
+                'lesson_name': 'Итоговый проект',
+            }
+            self.homeworks.setdefault(token, []).append(homework)
+            self.touch(homework, status, updated)
+        return homework
+
+    def add_token(self, token):
+        """Registers a token without homeworks."""
+        with self.lock:
+            self.homeworks.setdefault(token, [])
+
+    def set_status(self, token, homework_id, status, updated=None):
+        """Moves a homework to another status."""
+        with self.lock:
+            for homework in self.homeworks[token]:
+                if homework['id'] == homework_id:
+                    self.touch(homework, status, updated)
+                    return homework
+        raise KeyError(homework_id)
+
+    def touch(self, homework, status, updated=None):
+        """Sets the status and the update time of a homework."""
+        updated = int(self.clock() if updated is None else updated)
+        homework['status'] = status
+        homework['date_updated'] = iso_date(updated)
+        homework['updated'] = updated
+
+    def fail_next(self, status, body=None, count=1):
+        """Answers the next requests with a status and a raw or JSON body."""
+        with self.lock:
+            self.failures.extend([(status, body or {})] * count)
+
+    def populate(self, tenants, homeworks, prefix='token'):
+        """Registers tenants with random homeworks, returns the tokens."""
+        tokens = [f'{prefix}{number}' for number in range(tenants)]
+        for token in tokens:
+            self.add_token(token)
+            for _ in range(homeworks):
+                self.add_homework(
+                    token, self.random.choice(list(HOMEWORK_VERDICTS))
+                )
+        return tokens
+
+    def delay(self):
+        """Sleeps for the configured latency."""
+        latency = self.latency
+        if isinstance(latency, tuple):
+            latency = self.random.uniform(*latency)
+        if latency:
+            time.sleep(latency)
+
+    def mutate(self, homeworks):
+        """Moves a random share of homeworks to another status."""
+        statuses = list(HOMEWORK_VERDICTS)
+        for homework in homeworks:
+            if self.random.random() < self.churn:
+                self.touch(homework, self.random.choice(statuses))
+
+    def answer(self, authorization, query):
+        """Returns the status and body of an answer to a request."""
+        self.delay()
+        with self.lock:
+            self.requests += 1
+            if self.failures:
+                return self.failures.popleft()
+            if self.error_rate and self.random.random() < self.error_rate:
+                return self.error_status, {'detail': 'Injected error.'}
+            token = (authorization or '').partition('OAuth ')[2]
+            homeworks = self.homeworks.get(token)
+            if not token or homeworks is None:
+                return HTTPStatus.UNAUTHORIZED, NOT_AUTHENTICATED
+            try:
+                from_date = int(query.get('from_date', ['0'])[0])
+            except ValueError:
+                return HTTPStatus.BAD_REQUEST, WRONG_FROM_DATE
+            if self.churn:
+                self.mutate(homeworks)
+            return HTTPStatus.OK, {
+                'homeworks': [
+                    {key: value for key, value in homework.items()
+                     if key != 'updated'}
+                    for homework in reversed(homeworks)
+                    if homework['updated'] >= from_date
+                ],
+                'current_date': int(self.clock()),
+            }
+
+
+def main():
+    """Runs a populated fake API until interrupted."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--tenants', type=int, default=100)
+    parser.add_argument('--homeworks', type=int, default=10)
+    parser.add_argument('--latency', type=float, default=0)
+    parser.add_argument('--error-rate', type=float, default=0)
+    parser.add_argument('--churn', type=float, default=0)
+    parser.add_argument('--seed', type=int)
+    parser.add_argument('--subscriptions', help='write SUBSCRIPTIONS_FILE')
+    args = parser.parse_args()
+    fake = FakePracticum(
+        args.host, args.port, latency=args.latency,
+        error_rate=args.error_rate, churn=args.churn, seed=args.seed,
+        clock=time.time,
+    )
+    tokens = fake.populate(args.tenants, args.homeworks)
+    if args.subscriptions:
+        with open(args.subscriptions, 'w') as file:
+            json.dump([
+                {'token': token, 'chat_id': number}
+                for number, token in enumerate(tokens, 1)
+            ], file)
+    print(f'PRACTICUM_ENDPOINT={fake.url}', flush=True)
+    fake.serve()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class JsonHandler(BaseHTTPRequestHandler):
+    """Keep-alive handler answering with JSON bodies."""
+
+    protocol_version = 'HTTP/1.1'
+    # Headers and body are separate writes: without TCP_NODELAY every
+    # keep-alive answer waits for the client's delayed ACK.
+    disable_nagle_algorithm = True
+
+    def reply(self, status, body):
+        """Sends a raw or JSON body with its length."""
+        if isinstance(body, bytes):
+            content = body
+        else:
+            content = json.dumps(body, ensure_ascii=False).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, format, *args):
+        """Keeps load tests quiet."""
+
+
+class FakeServer:
+    """HTTP server on localhost, served from a background thread.
+
+    Subclasses set `handler`; the handler reaches the fake through
+    `self.server.fake`.
+    """
+
+    handler = JsonHandler
+
+    def __init__(self, host='127.0.0.1', port=0):
+        """Creates a server for `host` and `port`."""
+        self.lock = threading.Lock()
+        self.server = ThreadingHTTPServer((host, port), self.handler)
+        self.server.daemon_threads = True
+        self.server.fake = self
+        self.thread = None
+
+    @property
+    def base_url(self):
+        """Scheme, host and port of the server."""
+        host, port = self.server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self):
+        """Serves requests in a background thread."""
+        self.thread = threading.Thread(
+            target=self.server.serve_forever, args=(0.05,), daemon=True
+        )
+        self.thread.start()
+        return self
+
+    def stop(self):
+        """Stops serving and closes the socket."""
+        if self.thread is not None:
+            self.server.shutdown()
+            self.thread.join()
+        self.server.server_close()
+
+    def serve(self):
+        """Serves requests in the current thread until interrupted."""
+        try:
+            self.server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.server.server_close()
+
+    def __enter__(self):
+        """Starts the server."""
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        """Stops the server."""
+        self.stop()
@@ -0,0 +1,216 @@
+"""Local stand-in for the Telegram Bot API sendMessage/editMessageText.
+
+Usage: python -m fakes.telegram [--port 8081] [--chat-rate 1]
+           [--chat-burst 3] [--global-rate 30] [--latency 0.02]
+
+Point the bot at it with TELEGRAM_API_URL set to the printed URL.
+"""
+import argparse
+import json
+import math
+import time
+from collections import deque
+from http import HTTPStatus
+from urllib.parse import parse_qsl, urlsplit
+
+from fakes.server import FakeServer, JsonHandler
+from sender import TokenBucket
+
+
+def error(code, description, **parameters):
+    """Returns a Bot API error body."""
+    body = {'ok': False, 'error_code': code, 'description': description}
+    if parameters:
+        body['parameters'] = parameters
+    return code, body
+
+
+def chat_key(chat_id):
+    """Turns a numeric chat_id from the query string into an int."""
+    if isinstance(chat_id, str) and chat_id.lstrip('-').isdigit():
+        return int(chat_id)
+    return chat_id
+
+
+class Handler(JsonHandler):
+    """Routes /bot<token>/<method> to the FakeTelegram of the server."""
+
+    def do_POST(self):
+        """Calls a Bot API method with query, form or JSON parameters."""
+        url = urlsplit(self.path)
+        params = dict(parse_qsl(url.query))
+        length = int(self.headers.get('Content-Length') or 0)
+        if length:
+            body = self.rfile.read(length)
+            if self.headers.get('Content-Type', '').startswith(
+                'application/json'
+            ):
+                params.update(json.loads(body))
+            else:
+                params.update(parse_qsl(body.decode()))
+        token = method = ''
+        if url.path.startswith('/bot'):
+            token, _, method = url.path[len('/bot'):].partition('/')
+        self.reply(*self.server.fake.call(token, method, params))
+
+    do_GET = do_POST
+
+
+class FakeTelegram(FakeServer):
+    """Bot API served from memory on localhost.
+
+    Messages are accepted within Telegram-like flood limits: `chat_rate`
+    messages per second per chat with bursts of `chat_burst`, and
+    `global_rate` per second overall. Requests over a limit get 429 with
+    `retry_after` in whole seconds, as Telegram answers. `latency` delays
+    every answer and `fail_next` queues exact error answers.
+    """
+
+    handler = Handler
+
+    def __init__(self, host='127.0.0.1', port=0, chat_rate=1, chat_burst=3,
+                 global_rate=30, latency=0, clock=time.monotonic):
+        """Creates the fake Bot API with no chats seen yet."""
+        super().__init__(host, port)
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.latency = latency
+        self.clock = clock
+        self.global_bucket = TokenBucket(global_rate, clock=clock)
+        self.chat_buckets = {}
+        self.messages = {}
+        self.sent = []
+        self.failures = deque()
+        self.message_ids = 0
+        self.requests = 0
+        self.edited = 0
+        self.throttled = 0
+
+    @property
+    def url(self):
+        """Base URL to use instead of https://api.telegram.org."""
+        return self.base_url
+
+    def fail_next(self, code, description, count=1, **parameters):
+        """Answers the next method calls with a Bot API error."""
+        with self.lock:
+            self.failures.extend(
+                [error(code, description, **parameters)] * count
+            )
+
+    def admit(self, chat_id):
+        """Takes a chat and a global token, returns seconds to wait if over.
+
+        A refused request gives both tokens back.
+        """
+        bucket = self.chat_buckets.get(chat_id)
+        if bucket is None:
+            bucket = self.chat_buckets[chat_id] = TokenBucket(
+                self.chat_rate, self.chat_burst, clock=self.clock
+            )
+        buckets = (bucket, self.global_bucket)
+        wait = max([bucket.take() for bucket in buckets])
+        if wait:
+            for bucket in buckets:
+                bucket.tokens += 1
+        return wait
+
+    def message(self, chat_id, message_id, text):
+        """Returns a Message object as the Bot API serializes it."""
+        return {
+            'message_id': message_id,
+            'date': int(time.time()),
+            'chat': {'id': chat_id, 'type': 'private'},
+            'text': text,
+        }
+
+    def send_message(self, chat_id, text):
+        """Stores a new message."""
+        self.message_ids += 1
+        self.messages[(chat_id, self.message_ids)] = text
+        self.sent.append((chat_id, self.message_ids, text))
+        return self.message(chat_id, self.message_ids, text)
+
+    def edit_message_text(self, chat_id, message_id, text):
+        """Replaces the text of a stored message."""
+        key = (chat_id, int(message_id))
+        if key not in self.messages:
+            return error(
+                HTTPStatus.BAD_REQUEST,
+                'Bad Request: message to edit not found',
+            )
+        if self.messages[key] == text:
+            return error(
+                HTTPStatus.BAD_REQUEST,
+                'Bad Request: message is not modified: specified new '
+                'message content and reply markup are exactly the same as '
+                'a current content and reply markup of the message',
+            )
+        self.messages[key] = text
+        self.edited += 1
+        return self.message(chat_id, key[1], text)
+
+    def call(self, token, method, params):
+        """Returns the status and body answering a method call."""
+        if self.latency:
+            time.sleep(self.latency)
+        with self.lock:
+            self.requests += 1
+            if not token:
+                return error(HTTPStatus.NOT_FOUND, 'Not Found')
+            if self.failures:
+                return self.failures.popleft()
+            if method not in ('sendMessage', 'editMessageText'):
+                return error(HTTPStatus.NOT_FOUND, 'Not Found')
+            chat_id = chat_key(params.get('chat_id'))
+            text = params.get('text')
+            if chat_id is None:
+                return error(
+                    HTTPStatus.BAD_REQUEST, 'Bad Request: chat not found'
+                )
+            if not text:
+                return error(
+                    HTTPStatus.BAD_REQUEST,
+                    'Bad Request: message text is empty',
+                )
+            wait = self.admit(chat_id)
+            if wait:
+                self.throttled += 1
+                retry_after = max(1, math.ceil(wait))
+                return error(
+                    HTTPStatus.TOO_MANY_REQUESTS,
+                    f'Too Many Requests: retry after {retry_after}',
+                    retry_after=retry_after,
+                )
+            if method == 'sendMessage':
+                result = self.send_message(chat_id, text)
+            else:
+                result = self.edit_message_text(
+                    chat_id, params.get('message_id', 0), text
+                )
+            if isinstance(result, tuple):
+                return result
+            return HTTPStatus.OK, {'ok': True, 'result': result}
+
+
+def main():
+    """Runs the fake Bot API until interrupted."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8081)
+    parser.add_argument('--chat-rate', type=float, default=1)
+    parser.add_argument('--chat-burst', type=float, default=3)
+    parser.add_argument('--global-rate', type=float, default=30)
+    parser.add_argument('--latency', type=float, default=0)
+    args = parser.parse_args()
+    fake = FakeTelegram(
+        args.host, args.port, chat_rate=args.chat_rate,
+        chat_burst=args.chat_burst, global_rate=args.global_rate,
+        latency=args.latency,
+    )
+    print(f'TELEGRAM_API_URL={fake.url}', flush=True)
+    fake.serve()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,78 +1,166 @@
+import atexit
 import json
 import logging
-import sys
 import time
 from http import HTTPStatus
 
 import requests
-from telebot import TeleBot
+from telebot import TeleBot, apihelper
 from telebot.apihelper import ApiException
 
+from breaker import PRACTICUM_BREAKER, TELEGRAM_BREAKER
+from cache import ResponseCache
 from constants import (
     PRACTICUM_TOKEN,
     TELEGRAM_TOKEN,
     TELEGRAM_CHAT_ID,
+    TELEGRAM_API_URL,
+    METRICS_PORT,
+    PROFILE_DIR,
+    SUBSCRIPTIONS_FILE,
+    STATE_DB,
     RETRY_PERIOD,
+    REQUEST_TIMEOUT,
     ENDPOINT,
     HOMEWORK_VERDICTS,
 )
 from exceptions import (
+    CircuitOpen,
     CurrentDateStatus,
     JsonError,
     EndpointNotAvailable,
     NoVariableError,
     UnknownHomeworkStatus,
+    ValidationError,
 )
+from index import HomeworkIndex, homework_key, homework_state
+from logs import setup_logging
+from metrics import (
+    CYCLE_SECONDS,
+    HOMEWORKS,
+    MESSAGES,
+    TELEGRAM_SECONDS,
+    Stages,
+    start_metrics_server,
+)
+from outbox import Outbox
+from profiling import PROFILER
+from sender import permanent_failure
+from storage import StateStore
+from timing import CycleTimer
+from tracing import TRACER, annotate
 
 
 TOKENS = ['PRACTICUM_TOKEN', 'TELEGRAM_TOKEN', 'TELEGRAM_CHAT_ID']
+MULTI_TENANT_TOKENS = ['TELEGRAM_TOKEN']
 HEADERS = {'Authorization': f'OAuth {PRACTICUM_TOKEN}'}
+RESPONSE_CACHE = ResponseCache()
+ANSWERS = {}
 
 logger = logging.getLogger(__name__)
-handler = logging.StreamHandler(sys.stdout)
-formatter = logging.Formatter(
-    '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
-handler.setFormatter(formatter)
-logger.addHandler(handler)
+
+
+def use_bot_api(url):
+    """Sends Bot API requests to `url` instead of api.telegram.org."""
+    apihelper.API_URL = url.rstrip('/') + '/bot{0}/{1}'
 
 
 def check_tokens():
     """Checks the availability of environment variables."""
-    missing_tokens = [token for token in TOKENS if not globals()[token]]
+    required = MULTI_TENANT_TOKENS if SUBSCRIPTIONS_FILE else TOKENS
+    missing_tokens = [token for token in required if not globals()[token]]
     if missing_tokens:
         message = f'Missing of environment variables: {missing_tokens}'
         logger.critical(message)
         raise NoVariableError(message)
 
 
-def send_message(bot, message):
-    """Send message to chat."""
+def deliver_message(bot, chat_id, message):
+    """Send message to chat, return None if Telegram rejects it for good."""
+    started = time.perf_counter()
+    span = TRACER.start('send_message', chat_id=chat_id)
     try:
-        bot.send_message(chat_id=TELEGRAM_CHAT_ID, text=message)
+        TELEGRAM_BREAKER.call(bot.send_message, chat_id=chat_id, text=message)
+    except CircuitOpen as error:
+        span.fail(error)
+        MESSAGES.labels('rejected').inc()
+        logger.warning(f'Message to {chat_id} not sent: {error}')
+        return False
     except ApiException as error:
+        span.fail(error)
+        MESSAGES.labels('failed').inc()
         message = f'Failed to send message: {error}'
         logger.error(message)
-    else:
-        logger.debug(
-            f'Message succesfully sent to {TELEGRAM_CHAT_ID}: {message}'
-        )
+        return None if permanent_failure(error) else False
+    finally:
+        TELEGRAM_SECONDS.observe(time.perf_counter() - started)
+        span.end()
+    MESSAGES.labels('sent').inc()
+    logger.debug(f'Message succesfully sent to {chat_id}: {message}')
+    return True
 
 
-def get_api_answer(timestamp):
-    """Makes a request to endpoint."""
+def send_message(bot, message):
+    """Send message to chat."""
+    return deliver_message(bot, TELEGRAM_CHAT_ID, message)
+
+
+def deliver_outbox(bot, outbox):
+    """Sends due outbox messages to their chats, keeping failed ones."""
+    for entry_id, chat_id, text, _ in outbox.due():
+        if chat_id == TELEGRAM_CHAT_ID:
+            delivered = send_message(bot, text)
+        else:
+            delivered = deliver_message(bot, chat_id, text)
+        if delivered:
+            outbox.remove(entry_id)
+        elif delivered is None:
+            outbox.discard(entry_id, 'rejected by Telegram')
+        else:
+            outbox.defer(entry_id)
+
+
+def decode_answer(key, timestamp, response):
+    """Decodes the answer, reusing the last one if the body is unchanged."""
+    content = getattr(response, 'content', None)
+    if not isinstance(content, bytes) or not hasattr(response, 'headers'):
+        return response.json()
+    if RESPONSE_CACHE.unchanged(key, timestamp, response) and key in ANSWERS:
+        annotate('cache', 'unchanged')
+        return ANSWERS[key]
+    annotate('payload.bytes', len(content))
+    answer = ANSWERS[key] = response.json()
+    return answer
+
+
+def request_api_answer(timestamp, headers):
+    """Makes a request to endpoint with the given authorization headers."""
     params = {'from_date': timestamp}
+    key = headers.get('Authorization')
+    if key in ANSWERS:
+        headers = {**headers, **RESPONSE_CACHE.validators(key, timestamp)}
+    PRACTICUM_BREAKER.allow()
     try:
         response = requests.get(
             ENDPOINT,
             params=params,
-            headers=HEADERS
+            headers=headers,
+            timeout=REQUEST_TIMEOUT
         )
+        PRACTICUM_BREAKER.record(
+            response.status_code >= HTTPStatus.INTERNAL_SERVER_ERROR
+        )
+        annotate('http.status_code', response.status_code)
+        if response.status_code == HTTPStatus.NOT_MODIFIED and key in ANSWERS:
+            RESPONSE_CACHE.not_modified()
+            return ANSWERS[key]
         if response.status_code != HTTPStatus.OK:
             raise UnknownHomeworkStatus(
                 f'Not succsess status API response: {response.status_code}')
-        return response.json()
+        return decode_answer(key, timestamp, response)
     except requests.RequestException as error:
+        if not isinstance(error, json.JSONDecodeError):
+            PRACTICUM_BREAKER.failure()
         raise EndpointNotAvailable(
             f'Endpoint is not available: {error}'
         )
@@ -82,6 +170,11 @@ def get_api_answer(timestamp):
         )
 
 
+def get_api_answer(timestamp):
+    """Makes a request to endpoint."""
+    return request_api_answer(timestamp, HEADERS)
+
+
 def check_response(response):
     """Checks expected keys in API response."""
     if not isinstance(response, dict):
@@ -116,37 +209,143 @@ def parse_status(homework):
     return f'Изменился статус проверки работы "{homework_name}". {verdict}'
 
 
+def render_status(homework):
+    """Renders the message for a validated homework record."""
+    return (
+        f'Изменился статус проверки работы "{homework.homework_name}". '
+        f'{homework.verdict}'
+    )
+
+
+def updated_at(homework):
+    """Sort key ordering homeworks by their date_updated."""
+    return homework.get('date_updated') or ''
+
+
+def parse_statuses(homeworks):
+    """Renders homeworks oldest first, returns messages and failures."""
+    verdicts = HOMEWORK_VERDICTS
+    messages = []
+    failures = []
+    for homework in sorted(homeworks, key=updated_at):
+        try:
+            homework_name = homework['homework_name']
+            status = homework['status']
+        except KeyError as error:
+            failures.append((homework, f'Key {error} is not available'))
+            continue
+        verdict = verdicts.get(status)
+        if verdict is None:
+            failures.append((homework, f'{status} is not available'))
+            continue
+        messages.append(
+            f'Изменился статус проверки работы "{homework_name}". {verdict}'
+        )
+    return messages, failures
+
+
+def parse_changes(homeworks, index):
+    """Renders homeworks that changed, returns messages and skip errors."""
+    changed = []
+    errors = []
+    for homework in homeworks:
+        if not isinstance(homework, dict):
+            errors.append(f'Homework is not an object: {homework!r}')
+            continue
+        key = (None, homework_key(homework))
+        state = homework_state(homework)
+        if index.lookup(key) == state:
+            index.store(key, state)
+        else:
+            changed.append((key, state, homework))
+    messages, failures = parse_statuses(
+        [homework for _, _, homework in changed]
+    )
+    skipped = {id(homework) for homework, _ in failures}
+    for key, state, homework in changed:
+        if id(homework) not in skipped:
+            index.store(key, state)
+    errors.extend(error for _, error in failures)
+    return messages, errors
+
+
+def setup_services():
+    """Starts the optional metrics, profiling and Bot API endpoint."""
+    if METRICS_PORT:
+        start_metrics_server()
+    if PROFILE_DIR:
+        PROFILER.install()
+    if TELEGRAM_API_URL:
+        use_bot_api(TELEGRAM_API_URL)
+
+
 def main():
     """Main logic or the bot."""
     check_tokens()
+    setup_services()
     bot = TeleBot(token=TELEGRAM_TOKEN)
-    timestamp = int(time.time())
-    previous_message = None
+    if SUBSCRIPTIONS_FILE:
+        from engine import run_engine
+        run_engine(bot, SUBSCRIPTIONS_FILE)
+        return
+    store = StateStore(STATE_DB)
+    outbox = Outbox(store)
+    state = store.load(PRACTICUM_TOKEN, TELEGRAM_CHAT_ID) or {}
+    timestamp = state.get('timestamp', int(time.time()))
+    previous_message = state.get('previous_message')
+    timer = CycleTimer(RETRY_PERIOD)
+    index = HomeworkIndex()
 
     while True:
+        message = None
+        messages = []
+        stages = Stages()
         try:
+            stages.enter('request')
             response = get_api_answer(timestamp)
+            stages.enter('check')
             homeworks = check_response(response)
             timestamp = response['current_date']
+            HOMEWORKS.inc(len(homeworks))
+            stages.span.set('items', len(homeworks))
             if not homeworks:
                 message = 'No new homeworks statuses.'
                 logger.debug(message)
-            else:
-                message = parse_status(homeworks[0])
+            stages.enter('parse')
+            messages, errors = parse_changes(homeworks, index)
+            stages.span.set('changed', len(messages))
+            if errors:
+                raise ValidationError(errors)
 
-        except CurrentDateStatus as error:
+        except (CurrentDateStatus, CircuitOpen) as error:
+            stages.fail(error)
             logger.error(error)
 
         except Exception as error:
+            stages.fail(error)
             message = f'Bot program failure: {error}'
             logger.error(message)
 
         finally:
-            if message != previous_message:
-                send_message(bot, message)
+            stages.enter('send')
+            if message is not None and message != previous_message:
+                messages.append(message)
+            for message in messages:
+                outbox.add(TELEGRAM_CHAT_ID, message)
                 previous_message = message
-            time.sleep(RETRY_PERIOD)
+            stages.span.set('messages', len(messages))
+            deliver_outbox(bot, outbox)
+            stages.enter('store')
+            store.stage(
+                PRACTICUM_TOKEN, TELEGRAM_CHAT_ID, timestamp, previous_message
+            )
+            store.flush()
+            stages.finish(CYCLE_SECONDS)
+            PROFILER.cycle()
+            delay = timer.tick()
+            time.sleep(delay)
 
 
 if __name__ == '__main__':
+    atexit.register(setup_logging().stop)
     main()
@@ -0,0 +1,92 @@
+import threading
+from collections import OrderedDict
+
+from constants import INDEX_MAXSIZE
+
+
+def homework_key(homework):
+    """Returns the homework id, falling back to its name."""
+    return homework.get('id', homework.get('homework_name'))
+
+
+def homework_state(homework):
+    """Returns what the index remembers about a homework."""
+    return (homework.get('status'), homework.get('date_updated'))
+
+
+class HomeworkIndex:
+    """Last seen status and date_updated of each homework.
+
+    Entries are keyed by (scope, homework id), where the scope is usually
+    the tenant's token. Memory is bounded by `maxsize`: the least recently
+    seen homework is evicted first. Lookups and updates are O(1) and safe
+    to call from worker threads.
+    """
+
+    def __init__(self, maxsize=INDEX_MAXSIZE):
+        """Creates an empty index."""
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        """Returns the number of indexed homeworks."""
+        return len(self.entries)
+
+    def lookup(self, key):
+        """Returns the remembered state for a key without recording it."""
+        return self.entries.get(key)
+
+    def store(self, key, state):
+        """Remembers the state for a key, evicting the oldest if full."""
+        entries = self.entries
+        with self.lock:
+            entries[key] = state
+            entries.move_to_end(key)
+            if len(entries) > self.maxsize:
+                entries.popitem(last=False)
+
+    def update(self, key, state):
+        """Records a state, returns True if it is a new transition."""
+        if self.entries.get(key) == state:
+            with self.lock:
+                if key in self.entries:
+                    self.entries.move_to_end(key)
+            return False
+        self.store(key, state)
+        return True
+
+    def update_all(self, pairs):
+        """Records (key, state) pairs, flags the new transitions.
+
+        The same as calling `update` for each pair, but the lock is taken
+        once for the whole batch.
+        """
+        entries = self.entries
+        get = entries.get
+        move_to_end = entries.move_to_end
+        flags = []
+        append = flags.append
+        with self.lock:
+            for key, state in pairs:
+                if get(key) == state:
+                    move_to_end(key)
+                    append(False)
+                    continue
+                entries[key] = state
+                move_to_end(key)
+                append(True)
+            while len(entries) > self.maxsize:
+                entries.popitem(last=False)
+        return flags
+
+    def changed(self, homework, scope=None):
+        """Records a homework, returns True if it is a new transition."""
+        return self.update(
+            (scope, homework_key(homework)), homework_state(homework)
+        )
+
+    def diff(self, homeworks, scope=None):
+        """Returns the homeworks whose status changed since the last poll."""
+        changed = self.changed
+        return [homework for homework in homeworks if changed(homework, scope)]
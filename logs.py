@@ -0,0 +1,71 @@
+import json
+import logging
+import queue
+import random
+import sys
+from logging.handlers import QueueHandler, QueueListener
+
+from constants import LOG_DEBUG_SAMPLE_RATE, LOG_FORMAT, LOG_LEVEL
+
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats a record as one JSON object per line."""
+
+    def format(self, record):
+        """Returns the record as a JSON line."""
+        entry = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class SamplingFilter(logging.Filter):
+    """Keeps only a `rate` share of records at `level` and below."""
+
+    def __init__(self, rate, level=logging.DEBUG, random=random.random):
+        """Creates a filter keeping `rate` of the records."""
+        super().__init__()
+        self.rate = rate
+        self.level = level
+        self.random = random
+
+    def filter(self, record):
+        """Drops a share of low-level records."""
+        return record.levelno > self.level or self.random() < self.rate
+
+
+def setup_logging(
+    level=LOG_LEVEL,
+    json_output=LOG_FORMAT == 'json',
+    sample_rate=LOG_DEBUG_SAMPLE_RATE,
+    stream=None,
+):
+    """Sends root log records through a queue to a writer thread.
+
+    Logging calls only filter and enqueue the record; formatting and
+    writing to `stream` (stdout by default) happen on the listener thread,
+    so a slow sink does not stall polling. Returns the started listener;
+    stopping it flushes the records still in the queue.
+    """
+    records = queue.SimpleQueue()
+    handler = QueueHandler(records)
+    if sample_rate < 1:
+        handler.addFilter(SamplingFilter(sample_rate))
+    output = logging.StreamHandler(stream or sys.stdout)
+    output.setFormatter(
+        JsonFormatter() if json_output else logging.Formatter(TEXT_FORMAT)
+    )
+    root = logging.getLogger()
+    root.setLevel(level)
+    root.addHandler(handler)
+    listener = QueueListener(records, output)
+    listener.start()
+    return listener
@@ -0,0 +1,358 @@
+import threading
+from bisect import bisect_left
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from time import perf_counter
+
+from constants import METRICS_HOST, METRICS_PORT
+from tracing import CURRENT, TRACER
+
+
+DEFAULT_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10,
+)
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def escape(value):
+    """Escapes a label value for the text exposition format."""
+    return (
+        str(value).replace('\\', r'\\').replace('\n', r'\n')
+        .replace('"', r'\"')
+    )
+
+
+def label_text(names, values, extra=''):
+    """Formats {name="value",...} for a sample, or '' without labels."""
+    pairs = [f'{name}="{escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def number(value):
+    """Formats a sample value the way Prometheus expects."""
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class CounterChild:
+    """One labelled series of a counter."""
+
+    __slots__ = ('value', 'lock')
+
+    def __init__(self):
+        """Creates a zero counter."""
+        self.value = 0
+        self.lock = threading.Lock()
+
+    def inc(self, amount=1):
+        """Adds to the counter."""
+        with self.lock:
+            self.value += amount
+
+
+class GaugeChild:
+    """One labelled series of a gauge."""
+
+    __slots__ = ('value', 'function')
+
+    def __init__(self):
+        """Creates a zero gauge."""
+        self.value = 0
+        self.function = None
+
+    def set(self, value):
+        """Sets the current value."""
+        self.value = value
+
+    def set_function(self, function):
+        """Reads the value from `function` at exposition time instead."""
+        self.function = function
+
+    def get(self):
+        """Returns the current value."""
+        return self.function() if self.function is not None else self.value
+
+
+class HistogramChild:
+    """One labelled series of a histogram."""
+
+    __slots__ = ('buckets', 'counts', 'sum', 'lock')
+
+    def __init__(self, buckets):
+        """Creates an empty histogram over `buckets`."""
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.lock = threading.Lock()
+
+    def observe(self, value):
+        """Records one observation."""
+        index = bisect_left(self.buckets, value)
+        with self.lock:
+            self.counts[index] += 1
+            self.sum += value
+
+
+class Metric:
+    """Named family of series, one per combination of label values.
+
+    Children are created on first use and cached, so the hot path is a
+    dict lookup at most; bind `labels(...)` once where it matters.
+    """
+
+    kind = None
+    child = None
+
+    def __init__(self, name, documentation, labelnames=(), registry=None):
+        """Creates the metric and registers it."""
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.children = {}
+        self.lock = threading.Lock()
+        (REGISTRY if registry is None else registry).register(self)
+
+    def make_child(self):
+        """Returns a new series."""
+        return self.child()
+
+    def labels(self, *values):
+        """Returns the series for the given label values."""
+        child = self.children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(
+                    f'{self.name} expects labels {self.labelnames}'
+                )
+            with self.lock:
+                child = self.children.setdefault(values, self.make_child())
+        return child
+
+    def samples(self):
+        """Yields (suffix, label text, value) for every series."""
+        raise NotImplementedError
+
+    def expose(self):
+        """Returns the metric in text exposition format."""
+        lines = [
+            f'# HELP {self.name} {self.documentation}',
+            f'# TYPE {self.name} {self.kind}',
+        ]
+        lines.extend(
+            f'{self.name}{suffix}{labels} {number(value)}'
+            for suffix, labels, value in self.samples()
+        )
+        return '\n'.join(lines)
+
+
+class Counter(Metric):
+    """Monotonically increasing count."""
+
+    kind = 'counter'
+    child = CounterChild
+
+    def inc(self, amount=1):
+        """Adds to the unlabelled counter."""
+        self.labels().inc(amount)
+
+    def samples(self):
+        """Yields the value of every series."""
+        for values, child in list(self.children.items()):
+            yield '_total', label_text(self.labelnames, values), child.value
+
+
+class Gauge(Metric):
+    """Value that can go up and down."""
+
+    kind = 'gauge'
+    child = GaugeChild
+
+    def set(self, value):
+        """Sets the unlabelled gauge."""
+        self.labels().set(value)
+
+    def set_function(self, function):
+        """Reads the unlabelled gauge from `function` when exposed."""
+        self.labels().set_function(function)
+
+    def samples(self):
+        """Yields the value of every series."""
+        for values, child in list(self.children.items()):
+            yield '', label_text(self.labelnames, values), child.get()
+
+
+class Histogram(Metric):
+    """Distribution of observations over fixed buckets."""
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), registry=None,
+                 buckets=DEFAULT_BUCKETS):
+        """Creates the histogram and registers it."""
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames, registry)
+
+    def make_child(self):
+        """Returns a new series with the histogram's buckets."""
+        return HistogramChild(self.buckets)
+
+    def observe(self, value):
+        """Records one observation of the unlabelled histogram."""
+        self.labels().observe(value)
+
+    def samples(self):
+        """Yields cumulative buckets, sum and count of every series."""
+        bounds = self.buckets + (float('inf'),)
+        for values, child in list(self.children.items()):
+            with child.lock:
+                counts = list(child.counts)
+                total = child.sum
+            cumulative = 0
+            for bound, count in zip(bounds, counts):
+                cumulative += count
+                yield '_bucket', label_text(
+                    self.labelnames, values, f'le="{number(bound)}"'
+                ), cumulative
+            labels = label_text(self.labelnames, values)
+            yield '_sum', labels, total
+            yield '_count', labels, cumulative
+
+
+class Registry:
+    """Metrics exposed together."""
+
+    def __init__(self):
+        """Creates an empty registry."""
+        self.metrics = {}
+
+    def register(self, metric):
+        """Adds a metric, refusing duplicate names."""
+        if metric.name in self.metrics:
+            raise ValueError(f'Metric {metric.name} is already registered')
+        self.metrics[metric.name] = metric
+
+    def expose(self):
+        """Returns all metrics in text exposition format."""
+        return ''.join(
+            metric.expose() + '\n' for metric in self.metrics.values()
+        )
+
+
+REGISTRY = Registry()
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    """Serves the registry of the server at /metrics."""
+
+    def do_GET(self):
+        """Answers with the current metrics."""
+        if self.path.split('?')[0] != '/metrics':
+            self.send_error(HTTPStatus.NOT_FOUND)
+            return
+        content = self.server.registry.expose().encode()
+        self.send_response(HTTPStatus.OK)
+        self.send_header('Content-Type', CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, format, *args):
+        """Scrapes are not worth a log line."""
+
+
+def start_metrics_server(port=METRICS_PORT, host=METRICS_HOST,
+                         registry=REGISTRY):
+    """Serves /metrics from a daemon thread, returns the server."""
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    server.daemon_threads = True
+    server.registry = registry
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+STAGE_SECONDS = Histogram(
+    'homework_bot_stage_seconds',
+    'Time spent in each stage of a polling cycle.', ['stage'],
+)
+CYCLE_SECONDS = Histogram(
+    'homework_bot_cycle_seconds', 'Time spent in a whole polling cycle.',
+)
+ERRORS = Counter(
+    'homework_bot_errors', 'Errors by stage and exception class.',
+    ['stage', 'error'],
+)
+MESSAGES = Counter(
+    'homework_bot_messages', 'Telegram messages by outcome.', ['result'],
+)
+HOMEWORKS = Counter(
+    'homework_bot_homeworks', 'Homeworks received from the API.',
+)
+TELEGRAM_SECONDS = Histogram(
+    'homework_bot_telegram_seconds', 'Time spent in Telegram API requests.',
+)
+SEND_QUEUE = Gauge(
+    'homework_bot_send_queue', 'Messages waiting in the send queue.',
+)
+CYCLE_OVERRUN = Gauge(
+    'homework_bot_cycle_overrun_seconds',
+    'How far the last polling cycle overran its deadline.',
+)
+MISSED_DEADLINES = Counter(
+    'homework_bot_missed_deadlines',
+    'Polling deadlines skipped because a cycle overran.',
+)
+BREAKER_STATE = Gauge(
+    'homework_bot_breaker_state',
+    'Circuit breaker state: 0 closed, 1 open, 2 half-open.', ['dependency'],
+)
+
+
+class Stages:
+    """Times consecutive stages of a cycle into STAGE_SECONDS.
+
+    `enter` closes the current stage and opens the next one, so that a
+    cycle costs one clock read and one observation per stage. Each stage
+    is also a span under a root span for the whole cycle; `span` is the
+    current one, for attributes.
+    """
+
+    __slots__ = ('current', 'started', 'begun', 'root', 'span', 'token')
+
+    def __init__(self, name='cycle', **attributes):
+        """Creates stages of a root span called `name`."""
+        self.current = None
+        self.root = self.span = TRACER.start(name, **attributes)
+        self.token = CURRENT.set(self.root)
+        self.started = self.begun = perf_counter()
+
+    def enter(self, stage):
+        """Records the time spent in the current stage, starts `stage`."""
+        now = perf_counter()
+        if self.current is not None:
+            STAGE_SECONDS.labels(self.current).observe(now - self.started)
+            self.span.end()
+        self.current = stage
+        self.started = now
+        if stage is not None:
+            self.span = TRACER.child(self.root, stage)
+            CURRENT.set(self.span)
+
+    def finish(self, histogram=None):
+        """Closes the current stage and the root span.
+
+        With a histogram, the duration of the whole cycle is observed.
+        """
+        self.enter(None)
+        CURRENT.reset(self.token)
+        self.root.end()
+        if histogram is not None:
+            histogram.observe(self.started - self.begun)
+
+    def fail(self, error):
+        """Counts an error raised in the current stage."""
+        ERRORS.labels(self.current, type(error).__name__).inc()
+        self.span.fail(error)
+        self.root.fail(error)
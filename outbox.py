@@ -0,0 +1,121 @@
+import logging
+import time
+
+from constants import (
+    OUTBOX_MAX_ATTEMPTS,
+    OUTBOX_MAX_BACKOFF,
+    OUTBOX_MIN_BACKOFF,
+)
+
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    chat_id TEXT NOT NULL,
+    text TEXT NOT NULL,
+    homework_id TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt REAL NOT NULL
+)
+'''
+
+logger = logging.getLogger(__name__)
+
+
+class Outbox:
+    """Persistent queue of Telegram messages awaiting confirmation.
+
+    A message is written before the first delivery attempt and deleted
+    only after Telegram accepts it, which gives at-least-once delivery
+    across failures and restarts. A message that still fails after
+    `max_attempts` attempts, or that Telegram rejects for good, is
+    discarded. Lives in the StateStore database.
+    """
+
+    def __init__(
+        self, store, min_backoff=OUTBOX_MIN_BACKOFF,
+        max_backoff=OUTBOX_MAX_BACKOFF, max_attempts=OUTBOX_MAX_ATTEMPTS,
+        clock=time.time,
+    ):
+        """Creates an outbox stored in `store`."""
+        self.connection = store.connection
+        self.connection.execute(SCHEMA)
+        columns = {
+            row[1] for row in
+            self.connection.execute('PRAGMA table_info(outbox)')
+        }
+        if 'homework_id' not in columns:
+            self.connection.execute(
+                'ALTER TABLE outbox ADD COLUMN homework_id TEXT'
+            )
+        self.min_backoff = min_backoff
+        self.max_backoff = max_backoff
+        self.max_attempts = max_attempts
+        self.clock = clock
+
+    def __len__(self):
+        """Returns the number of stored messages."""
+        return self.connection.execute(
+            'SELECT COUNT(*) FROM outbox'
+        ).fetchone()[0]
+
+    def add(self, chat_id, text, homework_id=None):
+        """Stores a message, returns its id."""
+        if homework_id is not None:
+            homework_id = str(homework_id)
+        with self.connection:
+            return self.connection.execute(
+                'INSERT INTO outbox '
+                '(chat_id, text, homework_id, next_attempt) '
+                'VALUES (?, ?, ?, ?)',
+                (str(chat_id), text, homework_id, self.clock())
+            ).lastrowid
+
+    def remove(self, entry_id):
+        """Deletes a message confirmed by Telegram."""
+        with self.connection:
+            self.connection.execute(
+                'DELETE FROM outbox WHERE id = ?', (entry_id,)
+            )
+
+    def backoff(self, attempts):
+        """Returns the delay before the next attempt."""
+        return min(
+            self.max_backoff, self.min_backoff * 2 ** min(attempts - 1, 32)
+        )
+
+    def discard(self, entry_id, reason):
+        """Deletes a message that will never be delivered."""
+        logger.error(f'Outbox message {entry_id} discarded: {reason}.')
+        self.remove(entry_id)
+
+    def defer(self, entry_id):
+        """Schedules another attempt for a failed message with backoff.
+
+        Returns False if the message ran out of attempts and was discarded.
+        """
+        attempts = self.connection.execute(
+            'SELECT attempts FROM outbox WHERE id = ?', (entry_id,)
+        ).fetchone()
+        if attempts is None:
+            return False
+        attempts = attempts[0] + 1
+        if attempts >= self.max_attempts:
+            self.discard(entry_id, f'failed {attempts} times')
+            return False
+        with self.connection:
+            self.connection.execute(
+                'UPDATE outbox SET attempts = ?, next_attempt = ? '
+                'WHERE id = ?',
+                (attempts, self.clock() + self.backoff(attempts), entry_id)
+            )
+        return True
+
+    def due(self, limit=100):
+        """Returns (id, chat_id, text, homework_id) of due messages."""
+        return self.connection.execute(
+            'SELECT id, chat_id, text, homework_id FROM outbox '
+            'WHERE next_attempt <= ? '
+            'ORDER BY id LIMIT ?',
+            (self.clock(), limit)
+        ).fetchall()
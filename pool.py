@@ -0,0 +1,84 @@
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from constants import POOL_IDLE_TIMEOUT, POOL_MAXSIZE
+
+
+class ConnectionPool:
+    """Shared keep-alive session with a bounded connection pool.
+
+    Connections are dropped after `idle_timeout` seconds without requests,
+    so that a poll after a long pause does not hit sockets already closed
+    by the server.
+    """
+
+    def __init__(self, maxsize=POOL_MAXSIZE, idle_timeout=POOL_IDLE_TIMEOUT):
+        """Creates an empty pool."""
+        self.maxsize = maxsize
+        self.idle_timeout = idle_timeout
+        self.adapter = HTTPAdapter(
+            pool_connections=1, pool_maxsize=maxsize, pool_block=True
+        )
+        self.session = requests.Session()
+        self.session.mount('https://', self.adapter)
+        self.session.mount('http://', self.adapter)
+        self.last_used = time.monotonic()
+        self.evictions = 0
+        self.retired_requests = 0
+        self.retired_connections = 0
+        self.lock = threading.Lock()
+
+    def get(self, url, **kwargs):
+        """Performs a GET request over a pooled connection."""
+        self.evict_idle()
+        try:
+            return self.session.get(url, **kwargs)
+        finally:
+            self.last_used = time.monotonic()
+
+    def evict_idle(self):
+        """Closes pooled connections unused for longer than idle_timeout."""
+        with self.lock:
+            if time.monotonic() - self.last_used < self.idle_timeout:
+                return
+            requests_count, connections, _ = self.counters()
+            self.retired_requests += requests_count
+            self.retired_connections += connections
+            self.adapter.poolmanager.clear()
+            self.evictions += 1
+            self.last_used = time.monotonic()
+
+    def counters(self):
+        """Returns requests, opened and idle connections of live pools."""
+        requests_count = connections = idle = 0
+        pools = self.adapter.poolmanager.pools
+        for key in pools.keys():
+            host_pool = pools.get(key)
+            if host_pool is None:
+                continue
+            requests_count += host_pool.num_requests
+            connections += host_pool.num_connections
+            if host_pool.pool is not None:
+                idle += sum(1 for conn in list(host_pool.pool.queue) if conn)
+        return requests_count, connections, idle
+
+    def stats(self):
+        """Returns pool statistics to confirm that connections are reused."""
+        requests_count, connections, idle = self.counters()
+        requests_count += self.retired_requests
+        connections += self.retired_connections
+        return {
+            'requests': requests_count,
+            'connections_opened': connections,
+            'connections_reused': max(requests_count - connections, 0),
+            'idle_connections': idle,
+            'evictions': self.evictions,
+            'maxsize': self.maxsize,
+        }
+
+    def close(self):
+        """Closes the session and all pooled connections."""
+        self.session.close()
@@ -0,0 +1,168 @@
+import cProfile
+import io
+import logging
+import os
+import pstats
+import signal
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+from constants import PROFILE_CYCLES, PROFILE_DIR, PROFILE_TOP
+
+
+MEMORY_FRAMES = 10
+
+logger = logging.getLogger(__name__)
+
+
+class Profiler:
+    """cProfile runs and tracemalloc diffs started by signals.
+
+    SIGUSR1 starts a CPU profile that stops by itself after `cycles`
+    polling cycles (or on the next SIGUSR1). The first SIGUSR2 starts
+    tracing allocations; every next one writes the growth since the
+    previous SIGUSR2. Reports are written to `directory`.
+
+    cProfile only sees the thread it is enabled in, so jobs passed
+    through `wrap` (see ProfiledExecutor) are profiled in their worker
+    threads and merged into the report.
+    """
+
+    def __init__(self, directory, cycles=PROFILE_CYCLES, top=PROFILE_TOP):
+        """Creates a profiler writing reports to `directory`."""
+        self.directory = directory
+        self.cycles = cycles
+        self.top = top
+        self.profile = None
+        self.threads = {}
+        self.lock = threading.Lock()
+        self.remaining = 0
+        self.snapshot = None
+        self.reports = 0
+
+    @property
+    def profiling(self):
+        """Whether a CPU profile is running."""
+        return self.profile is not None
+
+    def path(self, kind, suffix):
+        """Returns a new report path in the output directory."""
+        os.makedirs(self.directory, exist_ok=True)
+        self.reports += 1
+        stamp = time.strftime('%Y%m%d-%H%M%S')
+        name = f'{kind}-{os.getpid()}-{stamp}-{self.reports}.{suffix}'
+        return os.path.join(self.directory, name)
+
+    def toggle(self, *args):
+        """Starts a CPU profile, or stops the running one."""
+        if self.profiling:
+            self.stop()
+        else:
+            self.start()
+
+    def start(self):
+        """Starts profiling the main thread for the next cycles."""
+        self.remaining = self.cycles
+        self.profile = cProfile.Profile()
+        self.profile.enable()
+        logger.info(f'CPU profiling started for {self.cycles} cycles.')
+
+    def stop(self):
+        """Stops profiling and writes the .prof dump with a text summary."""
+        profile, self.profile = self.profile, None
+        profile.disable()
+        with self.lock:
+            threads, self.threads = self.threads, {}
+        summary = io.StringIO()
+        stats = pstats.Stats(profile, stream=summary)
+        for thread_profile in threads.values():
+            stats.add(thread_profile)
+        path = self.path('cpu', 'prof')
+        stats.dump_stats(path)
+        stats.sort_stats('cumulative').print_stats(self.top)
+        with open(path[:-len('prof')] + 'txt', 'w') as file:
+            file.write(summary.getvalue())
+        logger.info(f'CPU profile written to {path}.')
+        return path
+
+    def thread_profile(self):
+        """Returns the profile of the current worker thread."""
+        thread = threading.get_ident()
+        with self.lock:
+            profile = self.threads.get(thread)
+            if profile is None:
+                profile = self.threads[thread] = cProfile.Profile()
+        return profile
+
+    def wrap(self, function):
+        """Returns `function` profiled in its thread if a profile runs."""
+        if self.profile is None:
+            return function
+
+        def profiled(*args, **kwargs):
+            profile = self.thread_profile()
+            profile.enable()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                profile.disable()
+
+        return profiled
+
+    def cycle(self):
+        """Counts a finished polling cycle towards the running profile."""
+        if self.profile is None:
+            return None
+        self.remaining -= 1
+        if self.remaining > 0:
+            return None
+        return self.stop()
+
+    def dump_memory(self, *args):
+        """Writes allocation growth since the previous dump."""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(MEMORY_FRAMES)
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+        ))
+        previous, self.snapshot = self.snapshot, snapshot
+        if previous is None:
+            logger.info('Memory tracing started, signal again for a diff.')
+            return None
+        stats = snapshot.compare_to(previous, 'lineno')
+        path = self.path('memory', 'txt')
+        growth = sum(stat.size_diff for stat in stats)
+        with open(path, 'w') as file:
+            file.write(f'Total growth: {growth / 1024:.1f} KiB\n\n')
+            for stat in stats[:self.top]:
+                file.write(f'{stat}\n')
+        logger.info(f'Memory diff written to {path}.')
+        return path
+
+    def install(self):
+        """Binds SIGUSR1 to CPU profiling and SIGUSR2 to memory diffs."""
+        handlers = {'SIGUSR1': self.toggle, 'SIGUSR2': self.dump_memory}
+        for name, handler in handlers.items():
+            try:
+                signal.signal(getattr(signal, name), handler)
+            except (AttributeError, ValueError):
+                logger.debug(f'Signal {name} is not supported here.')
+
+
+PROFILER = Profiler(PROFILE_DIR)
+
+
+class ProfiledExecutor(ThreadPoolExecutor):
+    """Thread pool whose jobs are included in a running CPU profile."""
+
+    def __init__(self, *args, profiler=PROFILER, **kwargs):
+        """Creates the pool, profiling jobs with `profiler`."""
+        super().__init__(*args, **kwargs)
+        self.profiler = profiler
+
+    def submit(self, function, /, *args, **kwargs):
+        """Schedules `function`, profiled if a profile is running."""
+        return super().submit(self.profiler.wrap(function), *args, **kwargs)
@@ -0,0 +1,48 @@
+import sys
+
+from constants import HOMEWORK_VERDICTS
+
+
+STATUSES = tuple(sys.intern(status) for status in HOMEWORK_VERDICTS)
+STATUS_CODES = {status: code for code, status in enumerate(STATUSES)}
+VERDICTS = tuple(HOMEWORK_VERDICTS[status] for status in STATUSES)
+
+
+class Homework:
+    """Validated homework: only the fields the bot needs.
+
+    The status is kept as its integer code in HOMEWORK_VERDICTS order, so
+    a record never holds on to the status string decoded from the answer.
+    Records are not meant to be changed once built.
+    """
+
+    __slots__ = ('id', 'homework_name', 'code', 'date_updated')
+
+    def __init__(self, id, homework_name, status, date_updated=None):
+        """Creates a record, storing `status` as its code."""
+        self.id = id
+        self.homework_name = homework_name
+        self.code = STATUS_CODES[status]
+        self.date_updated = date_updated
+
+    def __repr__(self):
+        """Returns the record as a constructor call."""
+        return (
+            f'Homework(id={self.id!r}, homework_name={self.homework_name!r}, '
+            f'status={self.status!r}, date_updated={self.date_updated!r})'
+        )
+
+    @property
+    def status(self):
+        """Interned status string."""
+        return STATUSES[self.code]
+
+    @property
+    def verdict(self):
+        """Verdict text for the status."""
+        return VERDICTS[self.code]
+
+    @property
+    def state(self):
+        """What the homework index remembers about the record."""
+        return (self.code, self.date_updated)
@@ -0,0 +1,98 @@
+import heapq
+import itertools
+import time
+
+from constants import MAX_POLL_INTERVAL, MIN_POLL_INTERVAL, RETRY_PERIOD
+from timing import next_deadline
+
+
+ACTIVE_STATUSES = {'reviewing'}
+
+
+class PollScheduler:
+    """Picks each tenant's next poll time from its last known status.
+
+    Tenants with a homework under review are polled every `min_interval`
+    seconds. Otherwise the interval starts at `min_interval` after a
+    status change and doubles with every poll that brings nothing new, up
+    to `max_interval`. Tenants with no known status start at RETRY_PERIOD.
+
+    Polls are scheduled at a fixed rate from the previous deadline, so
+    request and delivery latency does not make the schedule drift.
+    """
+
+    def __init__(
+        self,
+        min_interval=MIN_POLL_INTERVAL,
+        max_interval=MAX_POLL_INTERVAL,
+        clock=time.monotonic,
+    ):
+        """Creates an empty schedule."""
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.clock = clock
+        self.queue = []
+        self.counter = itertools.count()
+        self.deadlines = {}
+        self.missed = 0
+        self.max_overrun = 0.0
+
+    def interval(self, tenant):
+        """Returns seconds until the tenant's next poll."""
+        if tenant.status in ACTIVE_STATUSES:
+            return self.min_interval
+        if tenant.status is None:
+            interval = RETRY_PERIOD
+        else:
+            interval = self.min_interval * 2 ** min(tenant.idle_polls, 32)
+        return max(self.min_interval, min(interval, self.max_interval))
+
+    def add(self, tenant, due=None):
+        """Schedules a tenant, by default to be polled right away."""
+        if due is None:
+            due = self.clock()
+        self.deadlines[tenant] = due
+        heapq.heappush(self.queue, (due, next(self.counter), tenant))
+
+    def discard(self, tenant):
+        """Stops scheduling a tenant; its queued entry is dropped lazily."""
+        self.deadlines.pop(tenant, None)
+
+    def reschedule(self, tenant):
+        """Schedules the tenant's next poll after the one just finished.
+
+        Returns how many seconds the poll overran its next deadline.
+        """
+        if tenant not in self.deadlines:
+            return 0.0
+        due, overrun, missed = next_deadline(
+            self.deadlines[tenant], self.interval(tenant), self.clock()
+        )
+        if missed:
+            self.missed += missed
+            self.max_overrun = max(self.max_overrun, overrun)
+        self.add(tenant, due)
+        return overrun
+
+    def pop_due(self):
+        """Removes and returns all tenants whose poll time has come."""
+        now = self.clock()
+        due = []
+        while self.queue and self.queue[0][0] <= now:
+            deadline, _, tenant = heapq.heappop(self.queue)
+            if self.deadlines.get(tenant) == deadline:
+                due.append(tenant)
+        return due
+
+    def delay(self):
+        """Returns seconds until the next scheduled poll."""
+        if not self.queue:
+            return self.max_interval
+        return max(self.queue[0][0] - self.clock(), 0)
+
+    def stats(self):
+        """Returns the total of missed deadlines and the worst overrun."""
+        return {
+            'missed_deadlines': self.missed,
+            'max_overrun': round(self.max_overrun, 3),
+        }
@@ -0,0 +1,258 @@
+import itertools
+from collections import namedtuple
+
+from constants import HOMEWORK_VERDICTS
+from exceptions import CurrentDateStatus, ValidationError
+from records import Homework
+
+
+MISSING = object()
+
+
+class Field:
+    """Expected type of a value, its allowed values or its list items."""
+
+    __slots__ = ('types', 'required', 'choices', 'items')
+
+    def __init__(self, types, required=True, choices=None, items=None):
+        """Describes one field of a schema."""
+        self.types = types
+        self.required = required
+        self.choices = choices
+        self.items = items
+
+
+class Schema:
+    """Declarative description of a JSON object and its record type."""
+
+    def __init__(self, name, fields, record=None):
+        """Describes an object called `name` with `fields`."""
+        self.name = name
+        self.fields = fields
+        self.record = record or namedtuple(name.title(), fields)
+
+
+def type_name(types):
+    """Returns a readable name of a type or a tuple of types."""
+    if isinstance(types, tuple):
+        return ' or '.join(kind.__name__ for kind in types)
+    return types.__name__
+
+
+class Compiler:
+    """Generates the source of a single-pass validator for a schema.
+
+    Every check of every field, including the fields of list items, is
+    inlined into one function, so a payload is walked exactly once.
+    Violations are collected, not raised one by one: an invalid list item
+    is left out of the record and reported, while an invalid top-level
+    object raises ValidationError.
+    """
+
+    def __init__(self):
+        """Creates a compiler with no generated lines."""
+        self.lines = []
+        self.namespace = {
+            'MISSING': MISSING, 'ValidationError': ValidationError,
+        }
+        self.names = itertools.count()
+
+    def name(self, prefix):
+        """Returns a fresh local variable name."""
+        return f'{prefix}{next(self.names)}'
+
+    def constant(self, value):
+        """Makes a value available to the generated code by name."""
+        name = self.name('K')
+        self.namespace[name] = value
+        return name
+
+    def emit(self, indent, *lines):
+        """Appends indented source lines."""
+        self.lines.extend(' ' * indent + line for line in lines)
+
+    def fail(self, indent, ok, message):
+        """Emits recording a violation given as f-string source."""
+        self.emit(indent, f'append(f"{message}")', f'{ok} = False')
+
+    def type_test(self, value, field):
+        """Returns the source of an exact type test of a value."""
+        types = self.constant(field.types)
+        if isinstance(field.types, tuple):
+            return f'type({value}) in {types}'
+        return f'type({value}) is {types}'
+
+    def valid(self, value, field):
+        """Returns the source of an expression true for a valid value."""
+        condition = self.type_test(value, field)
+        if field.choices is not None:
+            choices = self.constant(frozenset(field.choices))
+            condition = f'{condition} and {value} in {choices}'
+        if not field.required:
+            condition = f'({value} is None or {condition})'
+        return condition
+
+    def check(self, indent, ok, value, path, field):
+        """Emits the checks reporting why a field is invalid."""
+        type_test = self.type_test(value, field)
+        if field.required:
+            self.emit(indent, f'if {value} is MISSING:')
+            self.fail(indent + 4, ok, f'{path}: missing')
+            self.emit(indent, f'elif not {type_test}:')
+        else:
+            self.emit(
+                indent, f'if {value} is not None and not {type_test}:'
+            )
+        self.fail(
+            indent + 4, ok,
+            f'{path}: expected {type_name(field.types)}, '
+            f'got {{type({value}).__name__}}'
+        )
+        if field.choices is not None:
+            choices = self.constant(frozenset(field.choices))
+            self.emit(indent, f'elif {value} not in {choices}:')
+            self.fail(indent + 4, ok, f'{path}: unknown value {{{value}!r}}')
+
+    def items(self, indent, value, path, schema):
+        """Emits the loop validating list items into records."""
+        records = self.name('r')
+        index = self.name('i')
+        item = self.name('x')
+        item_path = f'{path}[{{{index}}}]'
+        self.emit(
+            indent,
+            f'if type({value}) is list:',
+            f'    {records} = []',
+            f'    for {index}, {item} in enumerate({value}):',
+            f'        if type({item}) is not dict:',
+            f'            append(f"{item_path}: expected object, '
+            f'got {{type({item}).__name__}}")',
+            '            continue',
+        )
+        item_ok, record = self.object(indent + 8, item, item_path, schema)
+        self.emit(
+            indent + 8,
+            f'if {item_ok}:',
+            f'    {records}.append({record})',
+        )
+        self.emit(indent + 4, f'{value} = {records}')
+
+    def object(self, indent, source, path, schema):
+        """Emits the checks of an object, returns (ok, record) names.
+
+        Valid objects cost one combined condition; the per-field checks
+        that explain a violation only run when that condition fails.
+        """
+        ok = self.name('ok')
+        values = {name: self.name('v') for name in schema.fields}
+        required = [
+            name for name, field in schema.fields.items() if field.required
+        ]
+        if required:
+            # Subscripts are cheaper than .get() calls; a missing key is
+            # the rare case.
+            self.emit(indent, 'try:')
+            for name in required:
+                self.emit(indent + 4, f'{values[name]} = {source}[{name!r}]')
+            self.emit(indent, 'except KeyError:')
+            for name in required:
+                self.emit(
+                    indent + 4,
+                    f'{values[name]} = {source}.get({name!r}, MISSING)'
+                )
+        for name, field in schema.fields.items():
+            if not field.required:
+                self.emit(
+                    indent, f'{values[name]} = {source}.get({name!r})'
+                )
+        conditions = ' and '.join(
+            self.valid(values[name], field)
+            for name, field in schema.fields.items()
+        )
+        self.emit(
+            indent,
+            f'{ok} = True',
+            f'if not ({conditions}):',
+        )
+        for name, field in schema.fields.items():
+            self.check(
+                indent + 4, ok, values[name], f'{path}.{name}', field
+            )
+        for name, field in schema.fields.items():
+            if field.items is not None:
+                self.items(
+                    indent, values[name], f'{path}.{name}', field.items
+                )
+        record = self.constant(schema.record)
+        arguments = ', '.join(values.values())
+        if issubclass(schema.record, tuple):
+            # Skips the Python-level __new__ of named tuples.
+            new = self.constant(tuple.__new__)
+            return ok, f'{new}({record}, ({arguments},))'
+        return ok, f'{record}({arguments})'
+
+    def compile(self, schema):
+        """Returns the validator function for a schema."""
+        self.emit(
+            0,
+            'def validate(value):',
+            '    if type(value) is not dict:',
+            '        raise ValidationError(['
+            f'f"{schema.name}: expected object, got {{type(value).__name__}}"'
+            '])',
+            '    errors = []',
+            '    append = errors.append',
+        )
+        ok, record = self.object(4, 'value', schema.name, schema)
+        self.emit(
+            4,
+            f'if not {ok}:',
+            '    raise ValidationError(errors)',
+            f'return {record}, errors',
+        )
+        source = '\n'.join(self.lines)
+        exec(compile(source, f'<schema {schema.name}>', 'exec'),
+             self.namespace)
+        validate = self.namespace['validate']
+        validate.source = source
+        return validate
+
+
+def compile_schema(schema):
+    """Compiles a schema into a validator returning (record, violations).
+
+    Violations are those of the list items left out of the record.
+    """
+    return Compiler().compile(schema)
+
+
+HOMEWORK_SCHEMA = Schema('homework', {
+    'id': Field(int),
+    'homework_name': Field(str),
+    'status': Field(str, choices=HOMEWORK_VERDICTS),
+    'date_updated': Field(str, required=False),
+}, record=Homework)
+ANSWER_SCHEMA = Schema('response', {
+    'homeworks': Field(list, items=HOMEWORK_SCHEMA),
+    'current_date': Field(int),
+}, record=namedtuple('Answer', ('homeworks', 'current_date')))
+
+validate_homework = compile_schema(HOMEWORK_SCHEMA)
+validate_answer = compile_schema(ANSWER_SCHEMA)
+
+
+def check_answer(payload):
+    """Validates an API answer like check_response does.
+
+    An answer whose only violations are in `current_date` raises
+    CurrentDateStatus, which is logged but not sent to the chat.
+    """
+    try:
+        return validate_answer(payload)
+    except ValidationError as error:
+        if all(
+            message.startswith('response.current_date')
+            for message in error.errors
+        ):
+            raise CurrentDateStatus(str(error)) from error
+        raise
@@ -0,0 +1,339 @@
+import asyncio
+import logging
+import time
+
+from telebot.apihelper import ApiException, ApiTelegramException
+
+from breaker import TELEGRAM_BREAKER
+from edits import NOT_MODIFIED
+from exceptions import CircuitOpen
+from metrics import MESSAGES, SEND_QUEUE, TELEGRAM_SECONDS
+from tracing import TRACER, annotate
+
+from constants import (
+    OUTBOX_DRAIN_INTERVAL,
+    SEND_QUEUE_SIZE,
+    SEND_WORKERS,
+    TELEGRAM_CHAT_RATE,
+    TELEGRAM_GLOBAL_RATE,
+)
+
+
+logger = logging.getLogger(__name__)
+
+BAD_REQUEST = 400
+TOO_MANY_REQUESTS = 429
+INTERNAL_SERVER_ERROR = 500
+
+
+class TokenBucket:
+    """Token bucket refilled at `rate` tokens per second.
+
+    `pause` blocks the bucket until a deadline, e.g. Telegram's
+    retry_after: no token is handed out before it, however many tokens
+    have been refilled.
+    """
+
+    __slots__ = ('rate', 'capacity', 'tokens', 'updated', 'blocked_until',
+                 'clock')
+
+    def __init__(self, rate, capacity=None, clock=time.monotonic):
+        """Creates a full bucket."""
+        self.rate = rate
+        self.capacity = capacity or max(rate, 1)
+        self.tokens = self.capacity
+        self.clock = clock
+        self.updated = clock()
+        self.blocked_until = 0.0
+
+    def take(self):
+        """Takes a token, returns seconds to wait before it may be used."""
+        now = self.clock()
+        self.tokens = min(
+            self.capacity, self.tokens + (now - self.updated) * self.rate
+        )
+        self.updated = now
+        self.tokens -= 1
+        delay = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        return max(delay, self.blocked_until - now)
+
+    def blocked_for(self):
+        """Returns seconds left until the bucket is no longer paused."""
+        return max(self.blocked_until - self.clock(), 0.0)
+
+    def pause(self, seconds):
+        """Blocks the bucket for `seconds` from now, e.g. after a 429.
+
+        A later deadline replaces an earlier one; pauses do not add up.
+        """
+        self.blocked_until = max(self.blocked_until, self.clock() + seconds)
+
+
+def retry_after(error):
+    """Returns Telegram's retry_after for a 429 error, otherwise None."""
+    if not isinstance(error, ApiTelegramException):
+        return None
+    if error.error_code != TOO_MANY_REQUESTS:
+        return None
+    parameters = error.result_json.get('parameters') or {}
+    return parameters.get('retry_after', 1)
+
+
+def permanent_failure(error):
+    """Whether Telegram rejected a message for good: a 4xx other than 429.
+
+    Such as 403 "bot was blocked by the user" or 400 "chat not found".
+    """
+    return (
+        isinstance(error, ApiTelegramException)
+        and BAD_REQUEST <= error.error_code < INTERNAL_SERVER_ERROR
+        and error.error_code != TOO_MANY_REQUESTS
+    )
+
+
+class Sender:
+    """Bounded outbound queue drained within Telegram flood limits.
+
+    `submit` never blocks the poll loop: when the queue is full the message
+    is dropped and counted. Background workers take a token from the global
+    and the per-chat bucket before each request and honour `retry_after`
+    from 429 answers.
+
+    With an `Outbox`, `send` stores each message before queueing it and the
+    entry is deleted only once Telegram accepts it. Failed and dropped
+    messages stay in the outbox and are re-queued with backoff by a
+    background drainer.
+
+    With `MessageIds`, a message about a homework edits the message sent
+    for it before instead of posting a new one.
+    """
+
+    def __init__(
+        self, bot, maxsize=SEND_QUEUE_SIZE, workers=SEND_WORKERS,
+        global_rate=TELEGRAM_GLOBAL_RATE, chat_rate=TELEGRAM_CHAT_RATE,
+        outbox=None, drain_interval=OUTBOX_DRAIN_INTERVAL, message_ids=None,
+    ):
+        """Creates a sender delivering through `bot`."""
+        self.bot = bot
+        self.outbox = outbox
+        self.message_ids = message_ids
+        self.drain_interval = drain_interval
+        self.in_flight = set()
+        self.queue = asyncio.Queue(maxsize)
+        self.workers = workers
+        self.global_bucket = TokenBucket(global_rate)
+        self.chat_rate = chat_rate
+        self.chat_buckets = {}
+        self.tasks = []
+        self.sent = 0
+        self.edited = 0
+        self.failed = 0
+        self.dropped = 0
+        self.throttled = 0
+        SEND_QUEUE.set_function(self.queue.qsize)
+
+    def send(self, chat_id, text, homework_id=None):
+        """Stores a message in the outbox, if any, and queues it."""
+        entry_id = None
+        if self.outbox is not None:
+            entry_id = self.outbox.add(chat_id, text, homework_id)
+        return self.submit(chat_id, text, entry_id, homework_id)
+
+    def submit(self, chat_id, text, entry_id=None, homework_id=None):
+        """Queues a message, returns False if the queue is full."""
+        try:
+            self.queue.put_nowait((entry_id, chat_id, text, homework_id))
+        except asyncio.QueueFull:
+            self.dropped += 1
+            MESSAGES.labels('dropped').inc()
+            logger.error(f'Send queue is full, message to {chat_id} dropped.')
+            return False
+        if entry_id is not None:
+            self.in_flight.add(entry_id)
+        return True
+
+    def chat_bucket(self, chat_id):
+        """Returns the token bucket of a chat."""
+        bucket = self.chat_buckets.get(chat_id)
+        if bucket is None:
+            bucket = self.chat_buckets[chat_id] = TokenBucket(self.chat_rate)
+        return bucket
+
+    async def acquire(self, chat_id):
+        """Waits until both the chat and the global limit allow a request.
+
+        The chat's pause is checked again after every sleep, since another
+        worker may have hit a 429 for the chat in the meantime.
+        """
+        bucket = self.chat_bucket(chat_id)
+        delay = bucket.take()
+        while delay:
+            await asyncio.sleep(delay)
+            delay = bucket.blocked_for()
+        delay = self.global_bucket.take()
+        if delay:
+            await asyncio.sleep(delay)
+
+    def post(self, chat_id, text, message_id=None):
+        """Edits `message_id` or sends a new message, returns the new one.
+
+        Runs in a worker thread. Returns None when an existing message was
+        edited; falls back to a new message if it can no longer be edited.
+        """
+        started = time.perf_counter()
+        try:
+            if message_id is not None:
+                try:
+                    TELEGRAM_BREAKER.call(
+                        self.bot.edit_message_text,
+                        text, chat_id=chat_id, message_id=message_id
+                    )
+                    return None
+                except ApiTelegramException as error:
+                    if error.error_code != BAD_REQUEST:
+                        raise
+                    if NOT_MODIFIED in error.description:
+                        return None
+            return TELEGRAM_BREAKER.call(
+                self.bot.send_message, chat_id=chat_id, text=text
+            )
+        finally:
+            TELEGRAM_SECONDS.observe(time.perf_counter() - started)
+
+    async def deliver(self, chat_id, text, homework_id=None):
+        """Sends one message, retrying as long as Telegram asks to wait.
+
+        Returns True once sent, False if it may succeed later and None if
+        Telegram rejected it for good.
+        """
+        message_id = None
+        if self.message_ids is not None and homework_id is not None:
+            message_id = self.message_ids.get(chat_id, homework_id)
+        while True:
+            await self.acquire(chat_id)
+            try:
+                message = await asyncio.to_thread(
+                    self.post, chat_id, text, message_id
+                )
+            except CircuitOpen as error:
+                self.failed += 1
+                MESSAGES.labels('rejected').inc()
+                logger.warning(f'Message to {chat_id} not sent: {error}')
+                return False
+            except ApiException as error:
+                seconds = retry_after(error)
+                if seconds is None:
+                    self.failed += 1
+                    MESSAGES.labels('failed').inc()
+                    logger.error(f'Failed to send message: {error}')
+                    return None if permanent_failure(error) else False
+                self.throttled += 1
+                MESSAGES.labels('throttled').inc()
+                annotate('retry_after', seconds)
+                self.chat_bucket(chat_id).pause(seconds)
+                logger.warning(
+                    f'Telegram flood limit for {chat_id}, '
+                    f'retry after {seconds} s.'
+                )
+                continue
+            if message is None:
+                self.edited += 1
+                MESSAGES.labels('edited').inc()
+            else:
+                self.sent += 1
+                MESSAGES.labels('sent').inc()
+                if self.message_ids is not None and homework_id is not None:
+                    self.message_ids.set(
+                        chat_id, homework_id, message.message_id
+                    )
+            logger.debug(f'Message succesfully sent to {chat_id}: {text}')
+            return True
+
+    def settle(self, entry_id, delivered):
+        """Removes a delivered outbox entry or defers a failed one.
+
+        `delivered` is None when Telegram rejected the message for good;
+        such an entry is discarded rather than retried.
+        """
+        if entry_id is None:
+            return
+        self.in_flight.discard(entry_id)
+        if delivered:
+            self.outbox.remove(entry_id)
+        elif delivered is None:
+            self.outbox.discard(entry_id, 'rejected by Telegram')
+        else:
+            self.outbox.defer(entry_id)
+
+    async def work(self):
+        """Delivers queued messages until cancelled."""
+        while True:
+            entry_id, chat_id, text, homework_id = await self.queue.get()
+            delivered = False
+            with TRACER.span('send', chat_id=chat_id) as span:
+                try:
+                    delivered = await self.deliver(chat_id, text, homework_id)
+                except Exception as error:
+                    span.fail(error)
+                    self.failed += 1
+                    MESSAGES.labels('failed').inc()
+                    logger.error(f'Failed to send message: {error}')
+                finally:
+                    span.set('delivered', delivered)
+                    self.settle(entry_id, delivered)
+                    self.queue.task_done()
+
+    def drain(self):
+        """Re-queues outbox entries that are due for another attempt."""
+        free = self.queue.maxsize - self.queue.qsize()
+        if free <= 0:
+            return 0
+        queued = 0
+        for entry_id, chat_id, text, homework_id in self.outbox.due(
+            free + len(self.in_flight)
+        ):
+            if entry_id in self.in_flight:
+                continue
+            if not self.submit(chat_id, text, entry_id, homework_id):
+                break
+            queued += 1
+        return queued
+
+    async def drain_forever(self):
+        """Drains the outbox every `drain_interval` seconds."""
+        while True:
+            try:
+                queued = self.drain()
+            except Exception as error:
+                logger.error(f'Failed to drain the outbox: {error}')
+            else:
+                if queued:
+                    logger.info(f'{queued} outbox messages re-queued.')
+            await asyncio.sleep(self.drain_interval)
+
+    def start(self):
+        """Starts the background workers on the running event loop."""
+        self.tasks = [
+            asyncio.create_task(self.work()) for _ in range(self.workers)
+        ]
+        if self.outbox is not None:
+            self.tasks.append(asyncio.create_task(self.drain_forever()))
+
+    async def stop(self):
+        """Cancels the background workers."""
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+
+    def stats(self):
+        """Returns delivery counters and the current queue length."""
+        return {
+            'queued': self.queue.qsize(),
+            'outbox': len(self.outbox) if self.outbox is not None else 0,
+            'sent': self.sent,
+            'edited': self.edited,
+            'failed': self.failed,
+            'dropped': self.dropped,
+            'throttled': self.throttled,
+        }
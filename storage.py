@@ -0,0 +1,99 @@
+import sqlite3
+
+from constants import STATE_DB
+
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS cursors (
+    token TEXT NOT NULL,
+    chat_id TEXT NOT NULL,
+    timestamp INTEGER NOT NULL,
+    previous_message TEXT,
+    status TEXT,
+    PRIMARY KEY (token, chat_id)
+)
+'''
+
+
+class StateStore:
+    """SQLite store for polling cursors and dedup state.
+
+    Writes are staged in memory and committed in one transaction by
+    `flush`, so a batch of polls costs a single commit. The database runs
+    in WAL mode with `synchronous=NORMAL`: commits are appended to the log
+    and fsynced in batches at checkpoints. The default `:memory:` database
+    keeps state for the lifetime of the process only.
+    """
+
+    def __init__(self, path=STATE_DB):
+        """Opens the database at `path` and creates its tables."""
+        self.path = path
+        self.connection = sqlite3.connect(path, isolation_level=None)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+        self.connection.execute(SCHEMA)
+        self.cursors = {
+            (token, chat_id): {
+                'timestamp': timestamp,
+                'previous_message': previous_message,
+                'status': status,
+            }
+            for token, chat_id, timestamp, previous_message, status
+            in self.connection.execute('SELECT * FROM cursors')
+        }
+        self.pending = {}
+
+    def load(self, token, chat_id):
+        """Returns the saved state of a subscription or None."""
+        return self.cursors.get((token, str(chat_id)))
+
+    def stage(
+        self, token, chat_id, timestamp, previous_message=None, status=None
+    ):
+        """Stages the state of a subscription until the next flush."""
+        key = (token, str(chat_id))
+        state = {
+            'timestamp': timestamp,
+            'previous_message': previous_message,
+            'status': status,
+        }
+        self.cursors[key] = state
+        self.pending[key] = state
+
+    def restore(self, tenant):
+        """Resumes a tenant from its saved state, returns True if found."""
+        state = self.load(tenant.token, tenant.chat_id)
+        if state is None:
+            return False
+        tenant.timestamp = state['timestamp']
+        tenant.previous_message = state['previous_message']
+        tenant.status = state['status']
+        return True
+
+    def save(self, tenant):
+        """Stages the state of a tenant until the next flush."""
+        self.stage(
+            tenant.token, tenant.chat_id, tenant.timestamp,
+            tenant.previous_message, tenant.status
+        )
+
+    def flush(self):
+        """Commits all staged changes in one transaction."""
+        if not self.pending:
+            return
+        rows = [
+            (token, chat_id, state['timestamp'], state['previous_message'],
+             state['status'])
+            for (token, chat_id), state in self.pending.items()
+        ]
+        with self.connection:
+            self.connection.execute('BEGIN')
+            self.connection.executemany(
+                'INSERT OR REPLACE INTO cursors VALUES (?, ?, ?, ?, ?)', rows
+            )
+        self.pending.clear()
+
+    def close(self):
+        """Flushes staged changes and closes the database."""
+        self.flush()
+        self.connection.close()
@@ -0,0 +1,114 @@
+import codecs
+import json
+
+from constants import STREAM_CHUNK_SIZE
+
+
+WHITESPACE = ' \t\n\r'
+
+
+class StreamedAnswer:
+    """Incremental decoder of an API answer read from a file-like object.
+
+    Iterating yields the items of the `homeworks` list one at a time;
+    every other top-level field is collected into `fields`, which is
+    complete once iteration is over. Only the item being decoded and one
+    chunk of input are held in memory.
+    """
+
+    def __init__(self, raw, chunk_size=STREAM_CHUNK_SIZE):
+        """Creates a parser reading `raw` in chunks."""
+        self.raw = raw
+        self.chunk_size = chunk_size
+        self.decoder = json.JSONDecoder()
+        self.text = codecs.getincrementaldecoder('utf-8')()
+        self.buffer = ''
+        self.position = 0
+        self.eof = False
+        self.fields = {}
+
+    def read(self):
+        """Appends the next chunk to the buffer, returns False at EOF."""
+        if self.eof:
+            return False
+        chunk = self.raw.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            self.buffer = self.buffer[self.position:] + self.text.decode(
+                b'', final=True
+            )
+        else:
+            self.buffer = self.buffer[self.position:] + self.text.decode(chunk)
+        self.position = 0
+        return True
+
+    def error(self, message):
+        """Builds a decode error at the current position."""
+        return json.JSONDecodeError(message, self.buffer, self.position)
+
+    def peek(self):
+        """Skips whitespace and returns the next character or ''."""
+        while True:
+            buffer = self.buffer
+            while (
+                self.position < len(buffer)
+                and buffer[self.position] in WHITESPACE
+            ):
+                self.position += 1
+            if self.position < len(buffer):
+                return buffer[self.position]
+            if not self.read():
+                return ''
+
+    def expect(self, characters):
+        """Consumes one of `characters` and returns it."""
+        character = self.peek()
+        if not character or character not in characters:
+            raise self.error(f'Expecting one of {characters!r}')
+        self.position += 1
+        return character
+
+    def value(self):
+        """Decodes the next complete JSON value."""
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(
+                    self.buffer, self.position
+                )
+            except json.JSONDecodeError:
+                if not self.read():
+                    raise
+                continue
+            if end == len(self.buffer) and not self.eof:
+                self.read()
+                continue
+            self.position = end
+            return value
+
+    def items(self):
+        """Yields the items of the array that starts at the position."""
+        if self.peek() == ']':
+            self.position += 1
+            return
+        while True:
+            yield self.value()
+            if self.expect(',]') == ']':
+                return
+
+    def __iter__(self):
+        """Yields the homeworks and stores other fields in `fields`."""
+        self.expect('{')
+        if self.peek() == '}':
+            return
+        while True:
+            key = self.value()
+            self.expect(':')
+            if key == 'homeworks' and self.peek() == '[':
+                self.position += 1
+                self.fields['homeworks'] = []
+                yield from self.items()
+            else:
+                self.fields[key] = self.value()
+            if self.expect(',}') == '}':
+                return
@@ -0,0 +1,44 @@
+import json
+
+from exceptions import NoVariableError
+
+
+class Tenant:
+    """Practicum subscription polled on behalf of one Telegram chat."""
+
+    __slots__ = ('token', 'chat_id', 'headers', 'timestamp',
+                 'previous_message', 'status', 'idle_polls')
+
+    def __init__(self, token, chat_id, timestamp=0):
+        """Creates a subscription starting at `timestamp`."""
+        self.token = token
+        self.chat_id = chat_id
+        self.headers = {'Authorization': f'OAuth {token}'}
+        self.timestamp = timestamp
+        self.previous_message = None
+        self.status = None
+        self.idle_polls = 0
+
+    def __repr__(self):
+        """Returns the tenant without its token."""
+        return f'Tenant(chat_id={self.chat_id!r})'
+
+
+def load_tenants(path, timestamp=0):
+    """Loads (token, chat_id) subscriptions from a JSON file."""
+    with open(path, encoding='utf-8') as file:
+        subscriptions = json.load(file)
+    if not isinstance(subscriptions, list):
+        raise TypeError(
+            f'Subscriptions must be a list, received {type(subscriptions)}.'
+        )
+    tenants = []
+    for number, subscription in enumerate(subscriptions):
+        token = subscription.get('token')
+        chat_id = subscription.get('chat_id')
+        if not token or not chat_id:
+            raise NoVariableError(
+                f'Subscription #{number} has no "token" or "chat_id"'
+            )
+        tenants.append(Tenant(token, chat_id, timestamp))
+    return tenants
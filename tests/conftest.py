@@ -1,6 +1,7 @@
 import os
 import sys
 
+import pytest
 import pytest_timeout
 
 root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -53,3 +54,12 @@ pytest_timeout.write = write_timeout_reasons
 os.environ['PRACTICUM_TOKEN'] = 'sometoken'
 os.environ['TELEGRAM_TOKEN'] = '1234:abcdefg'
 os.environ['TELEGRAM_CHAT_ID'] = '12345'
+os.environ['STATE_DB'] = ':memory:'
+
+
+@pytest.fixture(autouse=True)
+def closed_breakers():
+    """Every test starts with closed circuit breakers."""
+    from breaker import PRACTICUM_BREAKER, TELEGRAM_BREAKER
+    PRACTICUM_BREAKER.reset()
+    TELEGRAM_BREAKER.reset()
@@ -0,0 +1,47 @@
+import json
+import os
+
+import pytest
+
+
+@pytest.fixture
+def suite(monkeypatch):
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    monkeypatch.syspath_prepend(os.path.join(root, 'benchmarks'))
+    import suite
+    return suite
+
+
+class TestSuite:
+    def test_report(self, suite, capsys):
+        report = suite.run([1, 10], list(suite.CASES), 3)
+        assert [(r['case'], r['scale']) for r in report['results']] == [
+            (case, scale) for case in suite.CASES for scale in (1, 10)
+        ]
+        for result in report['results']:
+            assert result['samples'] >= 3
+            assert result['p50_ms'] <= result['p99_ms']
+            assert result['throughput'] > 0
+        assert report['commit']
+
+    def test_main_is_restored(self, suite):
+        import homework
+        import requests
+        get = requests.get
+        suite.run_main(suite.Pool(suite.answers(2)), 2)
+        assert requests.get is get
+        assert homework.TeleBot is not suite.NullBot
+
+    def test_compare_flags_regressions(self, suite, tmp_path, capsys):
+        def write(name, p50):
+            path = tmp_path / name
+            path.write_text(json.dumps({'results': [{
+                'case': 'parse_status', 'scale': 100,
+                'p50_ms': p50, 'peak_kib': 10,
+            }]}))
+            return path
+
+        base = write('base.json', 1.0)
+        assert suite.compare(base, write('same.json', 1.05), 0.1) == 0
+        assert suite.compare(base, write('slow.json', 1.5), 0.1) == 1
+        assert 'REGRESSION' in capsys.readouterr().out
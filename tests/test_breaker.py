@@ -0,0 +1,151 @@
+import asyncio
+
+import pytest
+import requests
+from telebot.apihelper import ApiTelegramException
+
+from tests.test_engine import FakeResponse, MockPool, make_engine
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def telegram_error(code):
+    return ApiTelegramException('sendMessage', None, {
+        'error_code': code, 'description': 'error',
+    })
+
+
+@pytest.fixture
+def breaker_module():
+    import breaker
+    return breaker
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+@pytest.fixture
+def breaker(breaker_module, clock):
+    return breaker_module.CircuitBreaker(
+        'test', failures=2, reset_timeout=30, clock=clock
+    )
+
+
+class TestCircuitBreaker:
+    def test_opens_after_failures(self, breaker, breaker_module):
+        from exceptions import CircuitOpen
+        breaker.failure()
+        breaker.allow()
+        breaker.failure()
+        assert breaker.state == breaker_module.OPEN
+        calls = []
+        with pytest.raises(CircuitOpen):
+            breaker.call(calls.append, 1)
+        assert calls == []
+
+    def test_success_resets_failures(self, breaker, breaker_module):
+        breaker.failure()
+        breaker.success()
+        breaker.failure()
+        assert breaker.state == breaker_module.CLOSED
+
+    def test_half_open_trial(self, breaker, breaker_module, clock):
+        from exceptions import CircuitOpen
+        breaker.failure()
+        breaker.failure()
+        clock.now = 30
+        assert breaker.state == breaker_module.HALF_OPEN
+        breaker.allow()
+        with pytest.raises(CircuitOpen):
+            breaker.allow()
+        breaker.failure()
+        assert breaker.state == breaker_module.OPEN
+        clock.now = 60
+        assert breaker.call(len, 'ok') == 2
+        assert breaker.state == breaker_module.CLOSED
+
+    def test_only_outages_count(self, breaker_module, breaker):
+        breaker.is_failure = breaker_module.telegram_outage
+        for code in (400, 403, 429):
+            with pytest.raises(ApiTelegramException):
+                breaker.call(self.raise_error, telegram_error(code))
+        assert breaker.failures == 0
+        for _ in range(2):
+            with pytest.raises(ApiTelegramException):
+                breaker.call(self.raise_error, telegram_error(502))
+        assert breaker.state == breaker_module.OPEN
+
+    def test_state_metric(self, breaker, clock):
+        from metrics import REGISTRY
+        breaker.failure()
+        breaker.failure()
+        assert 'homework_bot_breaker_state{dependency="test"} 1' in (
+            REGISTRY.expose()
+        )
+        clock.now = 30
+        assert 'homework_bot_breaker_state{dependency="test"} 2' in (
+            REGISTRY.expose()
+        )
+
+    @staticmethod
+    def raise_error(error):
+        raise error
+
+
+class TestDependencies:
+    def test_practicum_fails_fast(self, monkeypatch, breaker_module):
+        import homework
+        from exceptions import CircuitOpen, EndpointNotAvailable
+        calls = []
+
+        def get(*args, **kwargs):
+            calls.append(kwargs['timeout'])
+            raise requests.ConnectionError('refused')
+
+        monkeypatch.setattr(homework.requests, 'get', get)
+        for _ in range(5):
+            with pytest.raises(EndpointNotAvailable):
+                homework.get_api_answer(0)
+        with pytest.raises(CircuitOpen):
+            homework.get_api_answer(0)
+        assert len(calls) == 5
+
+    def test_server_errors_open_engine_circuit(self, breaker_module):
+        import engine as engine_module
+        from tenants import Tenant
+        calls = []
+
+        def get(*args, **kwargs):
+            calls.append(1)
+            return FakeResponse({}, status_code=502)
+
+        bot = type('Bot', (), {'send_message': lambda *a, **k: None})()
+        engine = make_engine(engine_module, bot, [], MockPool(get))
+        tenant = Tenant('token', 1)
+        for _ in range(7):
+            asyncio.run(engine.poll_tenant(tenant))
+        assert len(calls) == 5
+        assert breaker_module.PRACTICUM_BREAKER.state == breaker_module.OPEN
+
+    def test_sender_rejects_while_open(self, breaker_module):
+        from sender import Sender
+        sent = []
+
+        class Bot:
+            def send_message(self, chat_id=None, text=None):
+                sent.append(text)
+
+        for _ in range(5):
+            breaker_module.TELEGRAM_BREAKER.failure()
+        sender = Sender(Bot(), global_rate=1000, chat_rate=1000)
+        assert not asyncio.run(sender.deliver(1, 'text'))
+        assert sent == []
+        assert sender.failed == 1
@@ -0,0 +1,127 @@
+import pytest
+
+from tests.test_engine import FakeResponse
+
+
+@pytest.fixture
+def client_module():
+    import client
+    return client
+
+
+@pytest.fixture
+def tenant():
+    from tenants import Tenant
+    return Tenant('token', 1, timestamp=100)
+
+
+class TestResponseCache:
+    def test_unchanged_body_is_not_decoded(self, client_module, tenant):
+        from cache import ResponseCache
+
+        responses = [
+            FakeResponse({'homeworks': [{'id': 1}], 'current_date': 200}),
+            FakeResponse({'homeworks': [{'id': 1}], 'current_date': 300}),
+            FakeResponse({'homeworks': [{'id': 2}], 'current_date': 400}),
+        ]
+
+        class Session:
+            def get(self, url, **kwargs):
+                return responses.pop(0)
+
+        cache = ResponseCache()
+        client = client_module.PracticumClient(Session(), cache)
+        assert client.fetch(tenant)['current_date'] == 200
+        assert client.fetch(tenant) is None
+        assert client.fetch(tenant)['homeworks'] == [{'id': 2}]
+        assert cache.stats()['hits'] == 1
+        assert cache.stats()['misses'] == 2
+
+    def test_validators_are_sent(self, client_module, tenant):
+        from cache import ResponseCache
+
+        sent_headers = []
+
+        class Session:
+            def get(self, url, headers=None, **kwargs):
+                sent_headers.append(headers)
+                if len(sent_headers) == 1:
+                    return FakeResponse(
+                        {'homeworks': [], 'current_date': 1},
+                        headers={'ETag': '"v1"'}
+                    )
+                return FakeResponse({}, status_code=304)
+
+        cache = ResponseCache()
+        client = client_module.PracticumClient(Session(), cache)
+        client.fetch(tenant)
+        assert client.fetch(tenant) is None
+        assert sent_headers[1]['If-None-Match'] == '"v1"'
+        assert sent_headers[1]['Authorization'] == 'OAuth token'
+        assert cache.stats()['hits'] == 1
+
+
+class TestEngineCache:
+    def test_moving_cursor_still_hits(self):
+        import asyncio
+
+        import engine as engine_module
+        from tests.test_engine import MockBot, MockPool, make_engine
+        from tenants import Tenant
+
+        dates = iter(range(200, 1000, 100))
+        cursors = []
+
+        def get(url, params=None, **kwargs):
+            cursors.append(params['from_date'])
+            return FakeResponse({
+                'homeworks': [{'id': 1, 'homework_name': 'hw',
+                               'status': 'approved'}],
+                'current_date': next(dates),
+            })
+
+        bot = MockBot()
+        engine = make_engine(engine_module, bot, [], MockPool(get))
+        tenant = Tenant('token', 1, timestamp=100)
+        for _ in range(3):
+            asyncio.run(engine.poll_tenant(tenant))
+        assert cursors == [100, 200, 200]
+        assert engine.cache.stats()['hits'] == 2
+        assert engine.cache.stats()['misses'] == 1
+
+
+class TestMainCache:
+    @pytest.fixture
+    def homework_module(self, monkeypatch):
+        import homework
+        from cache import ResponseCache
+
+        monkeypatch.setattr(homework, 'RESPONSE_CACHE', ResponseCache())
+        monkeypatch.setattr(homework, 'ANSWERS', {})
+        return homework
+
+    def test_unchanged_body_is_not_decoded(
+            self, homework_module, monkeypatch
+    ):
+        responses = [
+            FakeResponse({'homeworks': [{'id': 1}], 'current_date': 200},
+                         headers={'ETag': '"v1"'}),
+            FakeResponse({'homeworks': [{'id': 1}], 'current_date': 300},
+                         headers={'ETag': '"v1"'}),
+            FakeResponse({}, status_code=304),
+            FakeResponse({'homeworks': [{'id': 2}], 'current_date': 400}),
+        ]
+        sent_headers = []
+
+        def get(url, headers=None, **kwargs):
+            sent_headers.append(headers)
+            return responses.pop(0)
+
+        monkeypatch.setattr(homework_module.requests, 'get', get)
+        first = homework_module.get_api_answer(100)
+        assert homework_module.get_api_answer(200) is first
+        assert 'If-None-Match' not in sent_headers[1]
+        assert homework_module.get_api_answer(200) is first
+        assert sent_headers[2]['If-None-Match'] == '"v1"'
+        assert homework_module.get_api_answer(200)['current_date'] == 400
+        assert homework_module.RESPONSE_CACHE.stats()['hits'] == 2
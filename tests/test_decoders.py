@@ -0,0 +1,37 @@
+import pytest
+
+from exceptions import JsonError
+
+
+@pytest.fixture
+def decoders_module():
+    import decoders
+    return decoders
+
+
+class TestDecoder:
+    def test_stdlib_backend(self, decoders_module):
+        decoder = decoders_module.Decoder('json')
+        assert decoder.name == 'json'
+        assert decoder.decode('{"a": "ж"}'.encode()) == {'a': 'ж'}
+
+    def test_auto_prefers_installed_fast_backend(
+            self, monkeypatch, decoders_module
+    ):
+        monkeypatch.setattr(decoders_module, 'orjson', None)
+        monkeypatch.setattr(decoders_module, 'msgspec', None)
+        assert decoders_module.Decoder('auto').name == 'json'
+
+    @pytest.mark.parametrize('backend', ['auto', 'json'])
+    def test_errors_are_json_error(self, decoders_module, backend):
+        with pytest.raises(JsonError):
+            decoders_module.Decoder(backend).decode(b'{"homeworks": [')
+
+    def test_unknown_backend(self, decoders_module):
+        with pytest.raises(ValueError):
+            decoders_module.Decoder('yaml')
+
+    def test_missing_backend(self, monkeypatch, decoders_module):
+        monkeypatch.setattr(decoders_module, 'msgspec', None)
+        with pytest.raises(ImportError):
+            decoders_module.Decoder('msgspec')
@@ -0,0 +1,69 @@
+import pytest
+
+
+@pytest.fixture
+def digest():
+    from digest import Digest
+
+    class Clock:
+        now = 0.0
+
+        def __call__(self):
+            return self.now
+
+    return Digest(window=30, max_length=40, clock=Clock())
+
+
+class TestDigest:
+    def test_messages_are_coalesced_per_chat(self, digest):
+        assert digest.add(1, 'first') == []
+        assert digest.add(2, 'other') == []
+        assert digest.add(1, 'second') == []
+        assert digest.due() == []
+        digest.clock.now = 30
+        assert sorted(digest.due()) == [
+            (1, 'first\n\nsecond'), (2, 'other')
+        ]
+        assert digest.due() == []
+
+    def test_repeated_errors_are_counted(self, digest):
+        for _ in range(3):
+            digest.add(1, 'Bot program failure: down')
+        assert digest.flush() == [(1, 'Bot program failure: down (×3)')]
+
+    def test_size_cap_flushes_early(self, digest):
+        digest.add(1, 'a' * 20)
+        assert digest.add(1, 'b' * 20) == [(1, 'a' * 20)]
+        assert digest.flush() == [(1, 'b' * 20)]
+
+    def test_delay_until_window_closes(self, digest):
+        assert digest.delay() == 30
+        digest.add(1, 'text')
+        digest.clock.now = 10
+        assert digest.delay() == 20
+
+
+class TestEngineDigest:
+    def test_cursor_is_saved_once_digest_is_sent(self, digest):
+        import asyncio
+
+        import engine as engine_module
+        from tenants import Tenant
+        from tests.test_engine import MockBot, make_engine
+
+        tenant = Tenant('token', 1, timestamp=100)
+        engine = make_engine(engine_module, MockBot(), [tenant])
+        engine.digest = digest
+        engine.client.fetch = lambda tenant: {
+            'homeworks': [
+                {'id': 1, 'homework_name': 'hw', 'status': 'approved'}
+            ],
+            'current_date': 200,
+        }
+        asyncio.run(engine.run_cycle([tenant]))
+        assert digest.pending(1)
+        assert engine.store.load('token', 1) is None
+        digest.clock.now = 30
+        engine.flush_digests()
+        assert engine.store.load('token', 1)['timestamp'] == 200
+        assert engine.sender.queue.qsize() == 1
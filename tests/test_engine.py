@@ -0,0 +1,213 @@
+import asyncio
+import json
+import time
+
+import pytest
+
+from exceptions import NoVariableError
+
+
+class FakeResponse:
+    def __init__(self, data, status_code=200, headers=None):
+        self.status_code = status_code
+        self.content = json.dumps(data).encode()
+        self.headers = headers or {}
+
+    def json(self):
+        return json.loads(self.content)
+
+
+class MockPool:
+    def __init__(self, get):
+        self.get = get
+
+    def stats(self):
+        return {}
+
+    def close(self):
+        pass
+
+
+class MockBot:
+    def __init__(self):
+        self.sent = []
+
+    def send_message(self, chat_id=None, text=None, **kwargs):
+        self.sent.append((chat_id, text))
+
+
+async def poll_and_send(engine, *tenants):
+    engine.sender.start()
+    for tenant in tenants:
+        await engine.poll_tenant(tenant)
+    await engine.sender.queue.join()
+    await engine.sender.stop()
+
+
+def make_engine(engine_module, bot, tenants, pool=None, **kwargs):
+    from sender import Sender
+
+    engine = engine_module.Engine(
+        bot, tenants, pool=pool or MockPool(None), **kwargs
+    )
+    engine.sender = Sender(bot, global_rate=1000, chat_rate=1000)
+    return engine
+
+
+@pytest.fixture
+def tenants_module():
+    import tenants
+    return tenants
+
+
+@pytest.fixture
+def engine_module():
+    import engine
+    return engine
+
+
+class TestTenants:
+    def test_load_tenants(self, tmp_path, tenants_module):
+        path = tmp_path / 'subscriptions.json'
+        path.write_text(json.dumps([
+            {'token': 'first', 'chat_id': 1},
+            {'token': 'second', 'chat_id': 2},
+        ]))
+        tenants = tenants_module.load_tenants(path, timestamp=100)
+        assert [tenant.chat_id for tenant in tenants] == [1, 2]
+        assert tenants[1].headers == {'Authorization': 'OAuth second'}
+        assert all(tenant.timestamp == 100 for tenant in tenants)
+
+    def test_load_tenants_without_token(self, tmp_path, tenants_module):
+        path = tmp_path / 'subscriptions.json'
+        path.write_text(json.dumps([{'chat_id': 1}]))
+        with pytest.raises(NoVariableError):
+            tenants_module.load_tenants(path)
+
+
+class TestEngine:
+    def test_poll_tenant_uses_own_cursor_and_chat(
+            self, engine_module, tenants_module, data_with_new_hw_status
+    ):
+        calls = []
+
+        def mock_get(url, params=None, headers=None, **kwargs):
+            calls.append((params['from_date'], headers['Authorization']))
+            return FakeResponse(data_with_new_hw_status)
+
+        bot = MockBot()
+        first = tenants_module.Tenant('first', 1, timestamp=10)
+        second = tenants_module.Tenant('second', 2, timestamp=20)
+        engine = make_engine(
+            engine_module, bot, [first, second], pool=MockPool(mock_get),
+            concurrency=2
+        )
+        asyncio.run(poll_and_send(engine, first, second, first))
+
+        assert calls[:2] == [(10, 'OAuth first'), (20, 'OAuth second')]
+        current_date = data_with_new_hw_status['current_date']
+        assert first.timestamp == second.timestamp == current_date
+        assert [chat_id for chat_id, _ in bot.sent] == [1, 2]
+
+    def test_run_cycle_respects_concurrency_limit(
+            self, monkeypatch, engine_module, tenants_module
+    ):
+        active = []
+        peak = []
+
+        def mock_fetch(tenant):
+            active.append(1)
+            peak.append(len(active))
+            time.sleep(0.01)
+            active.pop()
+            return {'homeworks': [], 'current_date': tenant.timestamp + 1}
+
+        tenants = [tenants_module.Tenant(str(i), i) for i in range(10)]
+        engine = engine_module.Engine(
+            MockBot(), tenants, concurrency=3, pool=MockPool(None)
+        )
+        monkeypatch.setattr(engine.client, 'fetch', mock_fetch)
+        asyncio.run(engine.run_cycle())
+        assert max(peak) <= 3
+        assert all(tenant.timestamp == 1 for tenant in tenants)
+
+    def test_reload_keeps_state_of_unchanged_tenants(
+            self, engine_module, tenants_module
+    ):
+        kept = tenants_module.Tenant('kept', 1, timestamp=50)
+        removed = tenants_module.Tenant('removed', 2)
+        loaded = [
+            tenants_module.Tenant('kept', 1),
+            tenants_module.Tenant('added', 3),
+        ]
+        engine = engine_module.Engine(
+            MockBot(), [kept, removed], pool=MockPool(None),
+            loader=lambda: loaded
+        )
+        for tenant in engine.tenants:
+            engine.scheduler.add(tenant)
+        engine.request_reload()
+        engine.reload()
+        assert engine.tenants == [kept, loaded[1]]
+        assert kept.timestamp == 50
+        assert engine.scheduler.pop_due() == [kept, loaded[1]]
+
+    def test_stop_interrupts_sleep(self, engine_module):
+        engine = engine_module.Engine(MockBot(), [], pool=MockPool(None))
+
+        async def stop_soon():
+            asyncio.get_running_loop().call_later(0.01, engine.stop)
+            started = time.monotonic()
+            await engine.sleep(60)
+            return time.monotonic() - started
+
+        assert asyncio.run(stop_soon()) < 1
+
+    def test_every_homework_is_notified(self, engine_module, tenants_module):
+        from tests.test_statuses import HOMEWORKS
+
+        bot = MockBot()
+        tenant = tenants_module.Tenant('token', 1)
+        engine = make_engine(engine_module, bot, [tenant])
+        engine.client.fetch = lambda tenant: {
+            'homeworks': HOMEWORKS, 'current_date': 1
+        }
+        asyncio.run(poll_and_send(engine, tenant))
+        assert [text.split('"')[1] for _, text in bot.sent] == [
+            'first', 'second'
+        ]
+        assert tenant.status == 'approved'
+
+    def test_invalid_homework_does_not_block_valid_ones(
+            self, engine_module, tenants_module
+    ):
+        bot = MockBot()
+        tenant = tenants_module.Tenant('token', 1, timestamp=100)
+        engine = make_engine(engine_module, bot, [tenant])
+        engine.client.fetch = lambda tenant: {
+            'homeworks': [
+                {'id': 1, 'homework_name': 'a', 'status': 'approved'},
+                {'id': 2, 'homework_name': 'b', 'status': 'unknown'},
+            ],
+            'current_date': 200,
+        }
+        asyncio.run(poll_and_send(engine, tenant, tenant))
+        assert tenant.timestamp == 200
+        texts = [text for _, text in bot.sent]
+        assert len(texts) == 2
+        assert texts[0].startswith('Изменился статус проверки работы "a"')
+        assert "homeworks[1].status: unknown value 'unknown'" in texts[1]
+
+    def test_bad_current_date_is_only_logged(
+            self, engine_module, tenants_module, caplog
+    ):
+        bot = MockBot()
+        tenant = tenants_module.Tenant('token', 1, timestamp=100)
+        engine = make_engine(engine_module, bot, [tenant])
+        engine.client.fetch = lambda tenant: {
+            'homeworks': [], 'current_date': 'now',
+        }
+        asyncio.run(poll_and_send(engine, tenant))
+        assert bot.sent == []
+        assert tenant.timestamp == 100
+        assert 'response.current_date: expected int' in caplog.text
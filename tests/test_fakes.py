@@ -0,0 +1,167 @@
+import asyncio
+import time
+from http import HTTPStatus
+
+import pytest
+
+from tests.test_engine import MockBot, make_engine, poll_and_send
+
+
+@pytest.fixture
+def fake():
+    from fakes.practicum import FakePracticum
+    with FakePracticum(clock=lambda: 1000, seed=0) as fake:
+        yield fake
+
+
+@pytest.fixture
+def endpoint(fake, monkeypatch):
+    import client
+    import homework
+    monkeypatch.setattr(client, 'ENDPOINT', fake.url)
+    monkeypatch.setattr(homework, 'ENDPOINT', fake.url)
+    return fake.url
+
+
+class TestFakePracticum:
+    def test_answer_is_filtered_by_from_date(self, fake, endpoint):
+        import homework
+        fake.add_homework('token', 'approved', updated=900)
+        fresh = fake.add_homework('token', 'reviewing', updated=950)
+        headers = {'Authorization': 'OAuth token'}
+        answer = homework.request_api_answer(950, headers)
+        assert answer['current_date'] == 1000
+        assert [hw['id'] for hw in answer['homeworks']] == [fresh['id']]
+        assert answer['homeworks'][0]['date_updated'] == (
+            '1970-01-01T00:15:50Z'
+        )
+        assert len(homework.request_api_answer(0, headers)['homeworks']) == 2
+
+    def test_unknown_token_is_unauthorized(self, fake, endpoint):
+        import requests
+        response = requests.get(
+            endpoint, headers={'Authorization': 'OAuth nobody'}
+        )
+        assert response.status_code == HTTPStatus.UNAUTHORIZED
+        assert response.json()['code'] == 'not_authenticated'
+
+    def test_injected_failures(self, fake, endpoint):
+        import homework
+        from exceptions import UnknownHomeworkStatus
+        fake.add_token('token')
+        fake.fail_next(HTTPStatus.SERVICE_UNAVAILABLE)
+        headers = {'Authorization': 'OAuth token'}
+        with pytest.raises(UnknownHomeworkStatus):
+            homework.request_api_answer(0, headers)
+        assert homework.request_api_answer(0, headers)['homeworks'] == []
+        assert fake.requests == 2
+
+    def test_latency(self, fake, endpoint):
+        import homework
+        fake.add_token('token')
+        fake.latency = 0.05
+        started = time.monotonic()
+        homework.request_api_answer(0, {'Authorization': 'OAuth token'})
+        assert time.monotonic() - started >= 0.05
+
+    def test_engine_end_to_end(self, fake, endpoint):
+        import engine as engine_module
+        from pool import ConnectionPool
+        from tenants import Tenant
+        first = fake.add_homework('first', 'reviewing', updated=900)
+        fake.add_homework('second', 'approved', updated=900)
+        tenants = [Tenant('first', 1, 0), Tenant('second', 2, 0)]
+        bot = MockBot()
+        engine = make_engine(
+            engine_module, bot, tenants, pool=ConnectionPool(maxsize=2)
+        )
+
+        async def scenario():
+            await poll_and_send(engine, *tenants)
+            fake.set_status('first', first['id'], 'approved', updated=1000)
+            await poll_and_send(engine, tenants[0])
+
+        asyncio.run(scenario())
+        assert [chat_id for chat_id, _ in bot.sent] == [1, 2, 1]
+        assert engine.pool.stats()['requests'] == 3
+        engine.pool.close()
+
+
+@pytest.fixture
+def telegram(monkeypatch):
+    import homework
+    from telebot import apihelper
+    from fakes.telegram import FakeTelegram
+    now = [0.0]
+    with FakeTelegram(chat_burst=1, clock=lambda: now[0]) as fake:
+        monkeypatch.setattr(apihelper, 'API_URL', None)
+        homework.use_bot_api(fake.url)
+        fake.now = now
+        yield fake
+
+
+class TestFakeTelegram:
+    def test_send_and_edit(self, telegram):
+        from telebot import TeleBot
+        from telebot.apihelper import ApiTelegramException
+        bot = TeleBot('123:token')
+        message = bot.send_message(1, 'first')
+        telegram.now[0] += 1
+        bot.edit_message_text('second', chat_id=1,
+                              message_id=message.message_id)
+        assert telegram.messages == {(1, message.message_id): 'second'}
+        telegram.now[0] += 1
+        with pytest.raises(ApiTelegramException, match='not modified'):
+            bot.edit_message_text('second', chat_id=1,
+                                  message_id=message.message_id)
+
+    def test_chat_flood_limit(self, telegram):
+        from telebot import TeleBot
+        from sender import retry_after
+        bot = TeleBot('123:token')
+        bot.send_message(1, 'first')
+        bot.send_message(2, 'other chat')
+        with pytest.raises(Exception) as info:
+            bot.send_message(1, 'too soon')
+        assert retry_after(info.value) == 1
+        telegram.now[0] += 1
+        bot.send_message(1, 'in time')
+        assert [text for _, _, text in telegram.sent] == [
+            'first', 'other chat', 'in time'
+        ]
+        assert telegram.throttled == 1
+
+    def test_global_limit_keeps_chat_token(self, telegram):
+        from sender import TokenBucket
+        telegram.global_bucket = TokenBucket(
+            1, clock=lambda: telegram.now[0]
+        )
+        assert telegram.admit(1) == 0
+        assert telegram.admit(2) == 1
+        assert telegram.chat_buckets[2].tokens == 1
+        assert telegram.global_bucket.tokens == 0
+
+    def test_sender_delivers_through_fake(self, monkeypatch):
+        import homework
+        from telebot import TeleBot, apihelper
+        from fakes.telegram import FakeTelegram
+        from sender import Sender
+        monkeypatch.setattr(apihelper, 'API_URL', None)
+        telegram = FakeTelegram(
+            chat_rate=100, chat_burst=100, global_rate=1000
+        ).start()
+        homework.use_bot_api(telegram.url)
+        sender = Sender(TeleBot('123:token'), global_rate=1000,
+                        chat_rate=1000)
+
+        async def scenario():
+            sender.start()
+            for number in range(20):
+                sender.send(number % 4, f'message {number}')
+            await sender.queue.join()
+            await sender.stop()
+
+        asyncio.run(scenario())
+        telegram.stop()
+        assert sender.stats()['sent'] == 20
+        assert len(telegram.sent) == 20
@@ -0,0 +1,48 @@
+import pytest
+
+
+@pytest.fixture
+def index():
+    from index import HomeworkIndex
+    return HomeworkIndex(maxsize=2)
+
+
+def homework(id, status, date_updated='2021-04-11T10:00:00Z'):
+    return {'id': id, 'homework_name': f'hw{id}', 'status': status,
+            'date_updated': date_updated}
+
+
+class TestHomeworkIndex:
+    def test_only_transitions_are_reported(self, index):
+        assert index.diff([homework(1, 'reviewing')]) == [
+            homework(1, 'reviewing')
+        ]
+        assert index.diff([homework(1, 'reviewing')]) == []
+        assert index.diff([homework(1, 'approved')]) == [
+            homework(1, 'approved')
+        ]
+
+    def test_repeated_status_with_new_date_is_reported(self, index):
+        index.diff([homework(1, 'rejected')])
+        again = homework(1, 'rejected', '2021-04-12T10:00:00Z')
+        assert index.diff([again]) == [again]
+
+    def test_scopes_are_separate(self, index):
+        assert index.diff([homework(1, 'approved')], 'first')
+        assert index.diff([homework(1, 'approved')], 'second')
+
+    def test_least_recently_seen_is_evicted(self, index):
+        index.diff([homework(1, 'approved'), homework(2, 'approved')])
+        index.diff([homework(1, 'approved')])
+        index.diff([homework(3, 'approved')])
+        assert len(index) == 2
+        assert index.diff([homework(1, 'approved')]) == []
+        assert index.diff([homework(2, 'approved')]) != []
+
+    def test_update_all(self, index):
+        assert index.update_all([(1, 'a'), (2, 'b')]) == [True, True]
+        assert index.update_all([(1, 'a'), (2, 'c'), (3, 'd')]) == [
+            False, True, True
+        ]
+        assert len(index) == 2
+        assert index.lookup(1) is None
@@ -0,0 +1,67 @@
+import io
+import json
+import logging
+import time
+
+import pytest
+
+from logs import SamplingFilter, setup_logging
+
+
+@pytest.fixture
+def root():
+    root = logging.getLogger()
+    handlers, level = root.handlers[:], root.level
+    yield root
+    root.handlers[:] = handlers
+    root.setLevel(level)
+
+
+class SlowStream(io.StringIO):
+    def write(self, text):
+        time.sleep(0.05)
+        return super().write(text)
+
+
+class TestLogging:
+    def test_json_output(self, root):
+        stream = io.StringIO()
+        listener = setup_logging('DEBUG', json_output=True, stream=stream)
+        logging.getLogger('homework').info('Статус %s', 'approved')
+        listener.stop()
+        entry = json.loads(stream.getvalue())
+        assert entry['level'] == 'INFO'
+        assert entry['logger'] == 'homework'
+        assert entry['message'] == 'Статус approved'
+
+    def test_debug_sampling(self, root):
+        stream = io.StringIO()
+        listener = setup_logging('DEBUG', sample_rate=0, stream=stream)
+        logger = logging.getLogger('engine')
+        logger.debug('No new homeworks statuses.')
+        logger.info('Subscriptions reloaded.')
+        listener.stop()
+        assert stream.getvalue().splitlines()[0].endswith(
+            'engine - INFO - Subscriptions reloaded.'
+        )
+        assert 'No new homeworks' not in stream.getvalue()
+
+    def test_sampling_filter_rate(self):
+        values = iter([0.1, 0.9])
+        sampler = SamplingFilter(0.5, random=lambda: next(values))
+        debug = logging.makeLogRecord({'levelno': logging.DEBUG})
+        error = logging.makeLogRecord({'levelno': logging.ERROR})
+        assert sampler.filter(debug)
+        assert not sampler.filter(debug)
+        assert sampler.filter(error)
+
+    def test_slow_sink_does_not_block(self, root):
+        stream = SlowStream()
+        listener = setup_logging('DEBUG', stream=stream)
+        logger = logging.getLogger('homework')
+        started = time.perf_counter()
+        for number in range(10):
+            logger.debug('Message succesfully sent: %s', number)
+        assert time.perf_counter() - started < 0.25
+        listener.stop()
+        assert len(stream.getvalue().splitlines()) == 10
@@ -0,0 +1,116 @@
+import asyncio
+import urllib.request
+
+import pytest
+
+from tests.test_engine import MockBot, MockPool, make_engine
+
+
+@pytest.fixture
+def metrics():
+    import metrics
+    return metrics
+
+
+@pytest.fixture
+def registry(metrics):
+    return metrics.Registry()
+
+
+class TestMetrics:
+    def test_counter(self, metrics, registry):
+        errors = metrics.Counter(
+            'errors', 'Errors.', ['error'], registry=registry
+        )
+        errors.labels('JsonError').inc()
+        errors.labels('JsonError').inc(2)
+        errors.labels('say "hi"\n').inc()
+        assert registry.expose() == (
+            '# HELP errors Errors.\n'
+            '# TYPE errors counter\n'
+            'errors_total{error="JsonError"} 3\n'
+            'errors_total{error="say \\"hi\\"\\n"} 1\n'
+        )
+
+    def test_histogram(self, metrics, registry):
+        latency = metrics.Histogram(
+            'latency_seconds', 'Latency.', registry=registry,
+            buckets=(0.1, 1),
+        )
+        for value in (0.05, 0.1, 0.5, 3):
+            latency.observe(value)
+        lines = registry.expose().splitlines()[2:]
+        assert lines == [
+            'latency_seconds_bucket{le="0.1"} 2',
+            'latency_seconds_bucket{le="1"} 3',
+            'latency_seconds_bucket{le="+Inf"} 4',
+            'latency_seconds_sum 3.65',
+            'latency_seconds_count 4',
+        ]
+
+    def test_gauge_function_and_duplicates(self, metrics, registry):
+        queue = metrics.Gauge('queue', 'Queue.', registry=registry)
+        queue.set_function(lambda: 7)
+        assert registry.expose().endswith('queue 7\n')
+        with pytest.raises(ValueError):
+            metrics.Gauge('queue', 'Again.', registry=registry)
+        with pytest.raises(ValueError):
+            queue.labels('unexpected')
+
+    def test_http_endpoint(self, metrics, registry):
+        metrics.Counter('polls', 'Polls.', registry=registry).inc()
+        server = metrics.start_metrics_server(0, registry=registry)
+        try:
+            port = server.server_address[1]
+            with urllib.request.urlopen(
+                f'http://127.0.0.1:{port}/metrics'
+            ) as response:
+                assert response.headers['Content-Type'].startswith(
+                    'text/plain; version=0.0.4'
+                )
+                assert b'polls_total 1' in response.read()
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    def test_engine_counts_errors_by_class(self, metrics):
+        import engine as engine_module
+        from exceptions import EndpointNotAvailable
+        from tenants import Tenant
+
+        series = metrics.ERRORS.labels('request', 'EndpointNotAvailable')
+        before = series.value
+        request = metrics.STAGE_SECONDS.labels('request')
+        observed = sum(request.counts)
+        engine = make_engine(engine_module, MockBot(), [], MockPool(None))
+
+        def failing(tenant, stream=False):
+            raise EndpointNotAvailable('refused')
+
+        engine.client.request = failing
+        asyncio.run(engine.poll_tenant(Tenant('token', 1)))
+        assert series.value == before + 1
+        assert sum(request.counts) == observed + 1
+
+    def test_engine_exports_overrun(self, metrics):
+        import engine as engine_module
+        from scheduler import PollScheduler
+        from tenants import Tenant
+
+        missed = metrics.MISSED_DEADLINES.labels().value
+        now = [0.0]
+        engine = make_engine(engine_module, MockBot(), [], MockPool(None))
+        engine.scheduler = PollScheduler(
+            min_interval=60, max_interval=1800, clock=lambda: now[0]
+        )
+        tenant = Tenant('token', 1)
+        tenant.status = 'reviewing'
+        engine.scheduler.add(tenant)
+
+        async def slow_cycle(tenants):
+            now[0] = 150
+
+        engine.run_cycle = slow_cycle
+        asyncio.run(engine.run_due())
+        assert metrics.CYCLE_OVERRUN.labels().get() == 90
+        assert metrics.MISSED_DEADLINES.labels().value == missed + 2
@@ -0,0 +1,198 @@
+import asyncio
+
+import pytest
+from telebot.apihelper import ApiException, ApiTelegramException
+
+
+class FailingBot:
+    def __init__(self, failures=1):
+        self.failures = failures
+        self.sent = []
+
+    def send_message(self, chat_id=None, text=None, **kwargs):
+        if self.failures:
+            self.failures -= 1
+            raise ApiException('Telegram is down', 'send_message', None)
+        self.sent.append((chat_id, text))
+        return True
+
+
+@pytest.fixture
+def outbox(tmp_path):
+    from outbox import Outbox
+    from storage import StateStore
+
+    now = [1000.0]
+    box = Outbox(
+        StateStore(str(tmp_path / 'state.sqlite3')),
+        min_backoff=10, max_backoff=60, clock=lambda: now[0]
+    )
+    box.now = now
+    return box
+
+
+class TestOutbox:
+    def test_failed_entry_is_retried_with_backoff(self, outbox):
+        entry_id = outbox.add(1, 'text')
+        assert outbox.due() == [(entry_id, '1', 'text', None)]
+        outbox.defer(entry_id)
+        assert outbox.due() == []
+        outbox.now[0] += 10
+        assert outbox.due() == [(entry_id, '1', 'text', None)]
+        outbox.defer(entry_id)
+        outbox.now[0] += 10
+        assert outbox.due() == []
+        outbox.remove(entry_id)
+        assert len(outbox) == 0
+
+    def test_backoff_is_capped(self, outbox):
+        assert [outbox.backoff(attempt) for attempt in range(1, 6)] == [
+            10, 20, 40, 60, 60
+        ]
+
+    def test_entries_survive_restart(self, tmp_path, outbox):
+        from outbox import Outbox
+        from storage import StateStore
+
+        outbox.add(1, 'text')
+        restarted = Outbox(StateStore(str(tmp_path / 'state.sqlite3')))
+        assert [entry[2] for entry in restarted.due()] == ['text']
+
+
+class BlockedBot:
+    def __init__(self):
+        self.calls = 0
+
+    def send_message(self, chat_id=None, text=None, **kwargs):
+        self.calls += 1
+        raise ApiTelegramException('sendMessage', None, {
+            'error_code': 403,
+            'description': 'Forbidden: bot was blocked by the user',
+        })
+
+
+class TestOutboxLimits:
+    def test_entry_is_discarded_after_max_attempts(self, outbox):
+        outbox.max_attempts = 3
+        entry_id = outbox.add(1, 'text')
+        assert outbox.defer(entry_id)
+        assert outbox.defer(entry_id)
+        assert not outbox.defer(entry_id)
+        assert len(outbox) == 0
+
+    def test_permanent_error_is_not_retried(self, outbox):
+        from sender import Sender
+
+        bot = BlockedBot()
+        sender = Sender(
+            bot, global_rate=1000, chat_rate=1000, outbox=outbox,
+            drain_interval=60
+        )
+
+        async def send():
+            sender.start()
+            sender.send(1, 'text')
+            await sender.queue.join()
+            await sender.stop()
+
+        asyncio.run(send())
+        assert bot.calls == 1
+        assert len(outbox) == 0
+
+    def test_main_discards_permanent_errors(self, homework_module, outbox):
+        outbox.add(1, 'text')
+        homework_module.deliver_outbox(BlockedBot(), outbox)
+        assert len(outbox) == 0
+        outbox.add(1, 'text')
+        homework_module.deliver_outbox(FailingBot(failures=1), outbox)
+        assert len(outbox) == 1
+
+
+class TestSenderWithOutbox:
+    def test_message_is_kept_until_delivered(self, outbox):
+        from sender import Sender
+
+        bot = FailingBot(failures=1)
+        sender = Sender(
+            bot, global_rate=1000, chat_rate=1000, outbox=outbox,
+            drain_interval=60
+        )
+
+        async def send():
+            sender.start()
+            sender.send(1, 'text')
+            await sender.queue.join()
+            assert len(outbox) == 1
+            outbox.now[0] += 10
+            assert sender.drain() == 1
+            await sender.queue.join()
+            await sender.stop()
+
+        asyncio.run(send())
+        assert bot.sent == [('1', 'text')]
+        assert len(outbox) == 0
+
+
+class TestMainOutbox:
+    def test_failed_message_stays_in_outbox(self, homework_module, outbox):
+        homework_module.deliver_outbox(FailingBot(failures=1), outbox)
+        outbox.add(1, 'text')
+        homework_module.deliver_outbox(FailingBot(failures=1), outbox)
+        assert len(outbox) == 1
+        outbox.now[0] += 10
+        homework_module.deliver_outbox(FailingBot(failures=0), outbox)
+        assert len(outbox) == 0
+
+    def test_message_goes_to_its_own_chat(self, homework_module, outbox):
+        bot = FailingBot(failures=0)
+        outbox.add('999', 'other')
+        outbox.add(homework_module.TELEGRAM_CHAT_ID, 'own')
+        homework_module.deliver_outbox(bot, outbox)
+        assert bot.sent == [
+            ('999', 'other'), (homework_module.TELEGRAM_CHAT_ID, 'own')
+        ]
+
+
+class EditingBot:
+    def __init__(self):
+        self.sent = []
+        self.edited = []
+
+    def send_message(self, chat_id=None, text=None, **kwargs):
+        self.sent.append(text)
+
+        class Message:
+            message_id = len(self.sent)
+
+        return Message()
+
+    def edit_message_text(self, text, chat_id=None, message_id=None):
+        self.edited.append((message_id, text))
+
+
+class TestEditInPlace:
+    def test_status_change_edits_previous_message(self, tmp_path):
+        from edits import MessageIds
+        from sender import Sender
+        from storage import StateStore
+
+        path = str(tmp_path / 'state.sqlite3')
+        bot = EditingBot()
+        sender = Sender(
+            bot, global_rate=1000, chat_rate=1000,
+            message_ids=MessageIds(StateStore(path))
+        )
+
+        async def send():
+            sender.start()
+            sender.send(1, 'reviewing', homework_id=7)
+            await sender.queue.join()
+            sender.send(1, 'approved', homework_id=7)
+            sender.send(1, 'other', homework_id=8)
+            await sender.queue.join()
+            await sender.stop()
+
+        asyncio.run(send())
+        assert bot.sent == ['reviewing', 'other']
+        assert bot.edited == [(1, 'approved')]
+        assert MessageIds(StateStore(path)).get(1, 7) == 1
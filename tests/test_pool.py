@@ -0,0 +1,58 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+
+class KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        body = b'{"homeworks": [], "current_date": 1}'
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def local_url():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), KeepAliveHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_port}/'
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def pool_module():
+    import pool
+    return pool
+
+
+class TestConnectionPool:
+    def test_connections_are_reused(self, local_url, pool_module):
+        pool = pool_module.ConnectionPool(maxsize=2, idle_timeout=60)
+        for _ in range(5):
+            assert pool.get(local_url, timeout=1).json()['current_date'] == 1
+        stats = pool.stats()
+        pool.close()
+        assert stats['requests'] == 5
+        assert stats['connections_opened'] == 1
+        assert stats['connections_reused'] == 4
+        assert stats['idle_connections'] == 1
+
+    def test_idle_connections_are_evicted(self, local_url, pool_module):
+        pool = pool_module.ConnectionPool(maxsize=2, idle_timeout=0)
+        pool.get(local_url, timeout=1)
+        pool.get(local_url, timeout=1)
+        stats = pool.stats()
+        pool.close()
+        assert stats['evictions'] >= 1
+        assert stats['requests'] == 2
+        assert stats['connections_opened'] == 2
@@ -0,0 +1,86 @@
+import os
+import pstats
+import signal
+import tracemalloc
+
+import pytest
+
+from profiling import ProfiledExecutor, Profiler
+
+
+@pytest.fixture
+def profiler(tmp_path):
+    profiler = Profiler(str(tmp_path / 'profiles'), cycles=2, top=5)
+    yield profiler
+    if profiler.profiling:
+        profiler.profile.disable()
+    tracemalloc.stop()
+
+
+def busy():
+    return sum(i * i for i in range(10_000))
+
+
+def busy_worker():
+    return busy()
+
+
+class TestProfiler:
+    def test_profile_stops_after_cycles(self, profiler):
+        profiler.start()
+        busy()
+        assert profiler.cycle() is None
+        path = profiler.cycle()
+        assert not profiler.profiling
+        stats = pstats.Stats(path)
+        assert any(name == 'busy' for _, _, name in stats.stats)
+        with open(path[:-len('prof')] + 'txt') as file:
+            assert 'busy' in file.read()
+
+    def test_executor_threads_are_profiled(self, profiler):
+        with ProfiledExecutor(max_workers=2, profiler=profiler) as executor:
+            assert executor.submit(busy_worker).result() == busy()
+            profiler.start()
+            futures = [executor.submit(busy_worker) for _ in range(4)]
+            assert all(future.result() == busy() for future in futures)
+            path = profiler.stop()
+        stats = pstats.Stats(path)
+        calls = {
+            name: stat[1] for (_, _, name), stat in stats.stats.items()
+        }
+        assert calls['busy_worker'] == 4
+        assert not profiler.threads
+
+    def test_cycle_without_profile(self, profiler):
+        assert profiler.cycle() is None
+        assert not os.path.exists(profiler.directory)
+
+    def test_memory_diff(self, profiler):
+        assert profiler.dump_memory() is None
+        grown = [bytearray(1024) for _ in range(1000)]
+        path = profiler.dump_memory()
+        with open(path) as file:
+            report = file.read()
+        assert report.startswith('Total growth:')
+        assert 'test_profiling.py' in report
+        assert grown
+
+    def test_signals(self, profiler):
+        if not hasattr(signal, 'SIGUSR1'):
+            pytest.skip('SIGUSR1 is not available')
+        previous = {
+            number: signal.getsignal(number)
+            for number in (signal.SIGUSR1, signal.SIGUSR2)
+        }
+        try:
+            profiler.install()
+            os.kill(os.getpid(), signal.SIGUSR1)
+            assert profiler.profiling
+            os.kill(os.getpid(), signal.SIGUSR1)
+            assert not profiler.profiling
+            os.kill(os.getpid(), signal.SIGUSR2)
+            assert tracemalloc.is_tracing()
+        finally:
+            for number, handler in previous.items():
+                signal.signal(number, handler)
+        assert len(os.listdir(profiler.directory)) == 2
@@ -0,0 +1,118 @@
+import pytest
+
+
+@pytest.fixture
+def scheduler():
+    from scheduler import PollScheduler
+
+    class Clock:
+        now = 0.0
+
+        def __call__(self):
+            return self.now
+
+    return PollScheduler(min_interval=60, max_interval=1800, clock=Clock())
+
+
+@pytest.fixture
+def tenant():
+    from tenants import Tenant
+    return Tenant('token', 1)
+
+
+class TestPollScheduler:
+    def test_reviewing_is_polled_often(self, scheduler, tenant):
+        tenant.status = 'reviewing'
+        tenant.idle_polls = 10
+        assert scheduler.interval(tenant) == 60
+
+    def test_idle_tenant_backs_off_within_bounds(self, scheduler, tenant):
+        tenant.status = 'approved'
+        intervals = []
+        for idle_polls in range(8):
+            tenant.idle_polls = idle_polls
+            intervals.append(scheduler.interval(tenant))
+        assert intervals == [60, 120, 240, 480, 960, 1800, 1800, 1800]
+
+    def test_unknown_status_uses_retry_period(self, scheduler, tenant):
+        assert scheduler.interval(tenant) == 600
+
+    def test_pop_due_in_order(self, scheduler, tenant):
+        from tenants import Tenant
+
+        later = Tenant('later', 2)
+        later.status = 'approved'
+        later.idle_polls = 5
+        tenant.status = 'reviewing'
+        scheduler.add(later)
+        scheduler.add(tenant)
+        assert scheduler.pop_due() == [later, tenant]
+        scheduler.reschedule(later)
+        scheduler.reschedule(tenant)
+        assert scheduler.pop_due() == []
+        assert scheduler.delay() == 60
+        scheduler.clock.now = 60
+        assert scheduler.pop_due() == [tenant]
+        scheduler.clock.now = 1800
+        assert scheduler.pop_due() == [later]
+
+    def test_reschedule_is_drift_free(self, scheduler, tenant):
+        tenant.status = 'reviewing'
+        scheduler.add(tenant)
+        scheduler.pop_due()
+        scheduler.clock.now = 5
+        assert scheduler.reschedule(tenant) == 0
+        assert scheduler.queue[0][0] == 60
+
+    def test_overrun_skips_missed_deadlines(self, scheduler, tenant):
+        tenant.status = 'reviewing'
+        scheduler.add(tenant)
+        scheduler.pop_due()
+        scheduler.clock.now = 150
+        assert scheduler.reschedule(tenant) == 90
+        assert scheduler.queue[0][0] == 180
+        assert scheduler.stats()['missed_deadlines'] == 2
+
+    def test_discarded_tenant_is_not_polled(self, scheduler, tenant):
+        scheduler.add(tenant)
+        scheduler.discard(tenant)
+        assert scheduler.pop_due() == []
+
+
+class TestCycleTimer:
+    def test_tick_keeps_fixed_rate(self):
+        from timing import CycleTimer
+
+        now = [0.0]
+        timer = CycleTimer(600, clock=lambda: now[0])
+        now[0] = 2.5
+        assert timer.tick() == 598
+        now[0] = 600.7
+        assert timer.tick() == 600
+        assert timer.missed == 0
+
+    def test_tick_reports_missed_deadline(self):
+        from timing import CycleTimer
+
+        now = [0.0]
+        timer = CycleTimer(600, clock=lambda: now[0])
+        now[0] = 700
+        assert timer.tick() == 500
+        assert timer.missed == 1
+        assert timer.overrun == 100
+
+    def test_tick_exports_overrun(self):
+        from metrics import CYCLE_OVERRUN, MISSED_DEADLINES
+        from timing import CycleTimer
+
+        missed = MISSED_DEADLINES.labels().value
+        now = [0.0]
+        timer = CycleTimer(600, clock=lambda: now[0])
+        now[0] = 1900
+        timer.tick()
+        assert CYCLE_OVERRUN.labels().get() == 1300
+        assert MISSED_DEADLINES.labels().value == missed + 3
+        now[0] = 2400
+        timer.tick()
+        assert CYCLE_OVERRUN.labels().get() == 0
+        assert MISSED_DEADLINES.labels().value == missed + 3
@@ -0,0 +1,103 @@
+import pytest
+
+
+ANSWER = {
+    'homeworks': [
+        {'id': 1, 'homework_name': 'first', 'status': 'approved',
+         'date_updated': '2021-04-11T10:00:00Z'},
+        {'id': 2, 'homework_name': 'second', 'status': 'reviewing'},
+    ],
+    'current_date': 1618000000,
+}
+
+
+@pytest.fixture
+def schema():
+    import schema
+    return schema
+
+
+class TestValidator:
+    def test_records_are_returned(self, schema):
+        answer, errors = schema.validate_answer(ANSWER)
+        assert errors == []
+        assert answer.current_date == 1618000000
+        first, second = answer.homeworks
+        assert (first.id, first.homework_name, first.status) == (
+            1, 'first', 'approved'
+        )
+        assert first.date_updated == '2021-04-11T10:00:00Z'
+        assert second.date_updated is None
+
+    def test_all_violations_are_collected(self, schema):
+        from exceptions import ValidationError
+        with pytest.raises(ValidationError) as info:
+            schema.validate_answer({
+                'homeworks': [
+                    {'id': '1', 'status': 'unknown'},
+                    'not an object',
+                ],
+            })
+        assert info.value.errors == [
+            'response.current_date: missing',
+            'response.homeworks[0].id: expected int, got str',
+            'response.homeworks[0].homework_name: missing',
+            "response.homeworks[0].status: unknown value 'unknown'",
+            'response.homeworks[1]: expected object, got str',
+        ]
+
+    def test_invalid_items_are_skipped(self, schema):
+        answer, errors = schema.validate_answer({
+            'homeworks': [
+                {'id': 1, 'homework_name': 'first', 'status': 'unknown'},
+                {'id': 2, 'homework_name': 'second', 'status': 'approved'},
+                {'id': 3, 'status': 'approved'},
+            ],
+            'current_date': 100,
+        })
+        assert answer.current_date == 100
+        assert [homework.id for homework in answer.homeworks] == [2]
+        assert errors == [
+            "response.homeworks[0].status: unknown value 'unknown'",
+            'response.homeworks[2].homework_name: missing',
+        ]
+
+    @pytest.mark.parametrize('answer', [[], None, 'text'])
+    def test_answer_not_an_object(self, schema, answer):
+        from exceptions import ValidationError
+        with pytest.raises(ValidationError):
+            schema.validate_answer(answer)
+
+    def test_bad_current_date(self, schema):
+        from exceptions import CurrentDateStatus, ValidationError
+        with pytest.raises(CurrentDateStatus):
+            schema.check_answer({'homeworks': [], 'current_date': 'now'})
+        with pytest.raises(CurrentDateStatus):
+            schema.check_answer({'homeworks': []})
+        with pytest.raises(ValidationError):
+            schema.check_answer({'current_date': 'now'})
+
+    def test_custom_schema(self, schema):
+        validate = schema.compile_schema(schema.Schema('point', {
+            'x': schema.Field((int, float)),
+            'label': schema.Field(str, required=False),
+        }))
+        assert validate({'x': 1.5}) == ((1.5, None), [])
+        with pytest.raises(Exception, match='point.x: expected int or float'):
+            validate({'x': 'a'})
+
+
+class TestHomework:
+    def test_status_is_encoded(self, schema):
+        from constants import HOMEWORK_VERDICTS
+        homework = schema.validate_answer(ANSWER)[0].homeworks[0]
+        assert homework.code == list(HOMEWORK_VERDICTS).index('approved')
+        assert homework.status == 'approved'
+        assert homework.verdict == HOMEWORK_VERDICTS['approved']
+        assert homework.state == (homework.code, '2021-04-11T10:00:00Z')
+
+    def test_record_is_compact(self, schema):
+        from records import STATUSES
+        homework = schema.validate_answer(ANSWER)[0].homeworks[0]
+        assert not hasattr(homework, '__dict__')
+        assert homework.status is STATUSES[homework.code]
@@ -0,0 +1,107 @@
+import asyncio
+import time
+
+import pytest
+from telebot.apihelper import ApiTelegramException
+
+
+class FloodBot:
+    def __init__(self, floods=1):
+        self.floods = floods
+        self.sent = []
+
+    def send_message(self, chat_id=None, text=None, **kwargs):
+        if self.floods:
+            self.floods -= 1
+            raise ApiTelegramException('sendMessage', None, {
+                'error_code': 429,
+                'description': 'Too Many Requests: retry after 0',
+                'parameters': {'retry_after': 0.01},
+            })
+        self.sent.append((chat_id, text))
+
+
+@pytest.fixture
+def sender_module():
+    import sender
+    return sender
+
+
+class TestTokenBucket:
+    def test_rate_is_enforced(self, sender_module):
+        now = [0.0]
+        bucket = sender_module.TokenBucket(2, clock=lambda: now[0])
+        assert bucket.take() == 0
+        assert bucket.take() == 0
+        assert bucket.take() == 0.5
+        assert bucket.take() == 1.0
+        now[0] = 1.0
+        assert bucket.take() == 0.5
+
+    def test_pause(self, sender_module):
+        now = [0.0]
+        bucket = sender_module.TokenBucket(1, clock=lambda: now[0])
+        bucket.pause(3)
+        bucket.pause(1)
+        assert bucket.blocked_for() == 3
+        assert bucket.take() == 3
+        now[0] = 3.0
+        assert bucket.blocked_for() == 0
+        assert bucket.take() == 0
+
+
+class TestSender:
+    def test_retry_after_is_honoured(self, sender_module):
+        bot = FloodBot(floods=1)
+        sender = sender_module.Sender(bot, global_rate=1000, chat_rate=1000)
+
+        async def send():
+            sender.start()
+            sender.submit(1, 'text')
+            await sender.queue.join()
+            await sender.stop()
+
+        asyncio.run(send())
+        assert bot.sent == [(1, 'text')]
+        assert sender.stats()['throttled'] == 1
+
+    def test_no_message_is_sent_during_the_ban(self, sender_module):
+        sent = []
+
+        class Bot:
+            floods = 1
+
+            def send_message(self, chat_id=None, text=None):
+                if self.floods:
+                    self.floods -= 1
+                    raise ApiTelegramException('sendMessage', None, {
+                        'error_code': 429,
+                        'description': 'Too Many Requests: retry after 1',
+                        'parameters': {'retry_after': 0.3},
+                    })
+                sent.append(time.monotonic())
+
+        sender = sender_module.Sender(
+            Bot(), global_rate=1000, chat_rate=1000, workers=3
+        )
+        sender.chat_buckets[1] = sender_module.TokenBucket(20, capacity=1)
+
+        async def send():
+            sender.start()
+            for number in range(3):
+                sender.submit(1, f'text {number}')
+            await sender.queue.join()
+            await sender.stop()
+
+        started = time.monotonic()
+        asyncio.run(send())
+        assert len(sent) == 3
+        assert min(sent) - started >= 0.3
+        assert max(sent) - started < 0.9
+        assert sender.stats()['throttled'] == 1
+
+    def test_full_queue_does_not_block(self, sender_module):
+        sender = sender_module.Sender(FloodBot(0), maxsize=1)
+        assert sender.submit(1, 'first')
+        assert not sender.submit(1, 'second')
+        assert sender.stats()['dropped'] == 1
@@ -0,0 +1,102 @@
+import pytest
+
+
+HOMEWORKS = [
+    {'id': 2, 'homework_name': 'second', 'status': 'approved',
+     'date_updated': '2021-04-12T10:00:00Z'},
+    {'id': 1, 'homework_name': 'first', 'status': 'rejected',
+     'date_updated': '2021-04-11T10:00:00Z'},
+]
+
+
+class TestParseStatuses:
+    def test_all_homeworks_oldest_first(self, homework_module):
+        messages, failures = homework_module.parse_statuses(HOMEWORKS)
+        assert messages == [
+            homework_module.parse_status(HOMEWORKS[1]),
+            homework_module.parse_status(HOMEWORKS[0]),
+        ]
+        assert failures == []
+
+    def test_unknown_status(self, homework_module):
+        homework = {'homework_name': 'hw', 'status': 'unknown'}
+        messages, failures = homework_module.parse_statuses(
+            [homework] + HOMEWORKS
+        )
+        assert len(messages) == 2
+        assert failures == [(homework, 'unknown is not available')]
+
+    def test_missing_key(self, homework_module):
+        homework = {'status': 'approved'}
+        messages, failures = homework_module.parse_statuses([homework])
+        assert messages == []
+        assert failures == [
+            (homework, "Key 'homework_name' is not available")
+        ]
+
+
+class TestParseChanges:
+    def test_invalid_homeworks_are_skipped(self, homework_module):
+        from index import HomeworkIndex
+        index = HomeworkIndex()
+        homeworks = [
+            {'id': 3, 'homework_name': 'third', 'status': 'unknown'},
+            {'id': 4, 'status': 'approved'},
+            'not an object',
+        ] + HOMEWORKS
+        messages, errors = homework_module.parse_changes(homeworks, index)
+        assert messages == [
+            homework_module.parse_status(HOMEWORKS[1]),
+            homework_module.parse_status(HOMEWORKS[0]),
+        ]
+        assert errors == [
+            "Homework is not an object: 'not an object'",
+            'unknown is not available',
+            "Key 'homework_name' is not available",
+        ]
+        assert len(index) == 2
+        messages, errors = homework_module.parse_changes(homeworks, index)
+        assert messages == []
+        assert len(errors) == 3
+        fixed = {'id': 3, 'homework_name': 'third', 'status': 'approved'}
+        assert homework_module.parse_changes([fixed], index) == (
+            [homework_module.parse_status(fixed)], []
+        )
+
+
+class StopPolling(Exception):
+    pass
+
+
+class TestMain:
+    def test_skipped_homework_is_reported_once(
+        self, homework_module, monkeypatch
+    ):
+        from tests.test_engine import MockBot
+
+        bot = MockBot()
+        answer = {
+            'homeworks': [
+                {'id': 3, 'homework_name': 'third', 'status': 'unknown'}
+            ] + HOMEWORKS,
+            'current_date': 1,
+        }
+        polls = []
+
+        def sleep(delay):
+            polls.append(delay)
+            if len(polls) == 2:
+                raise StopPolling
+
+        monkeypatch.setattr(homework_module, 'TeleBot', lambda token: bot)
+        monkeypatch.setattr(
+            homework_module, 'get_api_answer', lambda timestamp: answer
+        )
+        monkeypatch.setattr(homework_module.time, 'sleep', sleep)
+        with pytest.raises(StopPolling):
+            homework_module.main()
+        assert bot.sent == [
+            ('12345', homework_module.parse_status(HOMEWORKS[1])),
+            ('12345', homework_module.parse_status(HOMEWORKS[0])),
+            ('12345', 'Bot program failure: unknown is not available'),
+        ]
@@ -0,0 +1,41 @@
+import pytest
+
+
+@pytest.fixture
+def storage_module():
+    import storage
+    return storage
+
+
+class TestStateStore:
+    def test_state_survives_restart(self, tmp_path, storage_module):
+        from tenants import Tenant
+
+        path = str(tmp_path / 'state.sqlite3')
+        store = storage_module.StateStore(path)
+        tenant = Tenant('token', 12345, timestamp=100)
+        tenant.previous_message = 'approved'
+        tenant.status = 'approved'
+        store.save(tenant)
+        store.close()
+
+        restarted = storage_module.StateStore(path)
+        resumed = Tenant('token', '12345', timestamp=999)
+        assert restarted.restore(resumed)
+        assert resumed.timestamp == 100
+        assert resumed.previous_message == 'approved'
+        assert resumed.status == 'approved'
+        assert not restarted.restore(Tenant('other', 1))
+        restarted.close()
+
+    def test_nothing_is_written_before_flush(
+            self, tmp_path, storage_module
+    ):
+        path = str(tmp_path / 'state.sqlite3')
+        store = storage_module.StateStore(path)
+        store.stage('token', 1, 100)
+        assert storage_module.StateStore(path).load('token', 1) is None
+        store.flush()
+        assert storage_module.StateStore(path).load('token', 1) == {
+            'timestamp': 100, 'previous_message': None, 'status': None,
+        }
@@ -0,0 +1,125 @@
+import asyncio
+import io
+import json
+
+import pytest
+
+from tests.test_engine import MockBot, MockPool, make_engine, poll_and_send
+
+
+ANSWER = {
+    'homeworks': [
+        {'id': i, 'homework_name': f'hw{i}', 'status': 'approved',
+         'date_updated': f'2021-04-{10 + i}T10:00:00Z', 'lesson_name': 'ж'}
+        for i in range(5)
+    ],
+    'current_date': 1234567,
+}
+
+
+class StreamResponse:
+    status_code = 200
+
+    def __init__(self, data):
+        self.raw = io.BytesIO(json.dumps(data, ensure_ascii=False).encode())
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.raw.close()
+
+    def close(self):
+        self.raw.close()
+
+
+@pytest.fixture
+def streaming_module():
+    import streaming
+    return streaming
+
+
+class TestStreamedAnswer:
+    @pytest.mark.parametrize('chunk_size', [1, 7, 4096])
+    def test_items_are_yielded_one_by_one(self, streaming_module, chunk_size):
+        raw = io.BytesIO(json.dumps(ANSWER, ensure_ascii=False).encode())
+        answer = streaming_module.StreamedAnswer(raw, chunk_size)
+        assert list(answer) == ANSWER['homeworks']
+        assert answer.fields == {'homeworks': [], 'current_date': 1234567}
+
+    def test_homeworks_not_a_list(self, streaming_module):
+        raw = io.BytesIO(b'{"homeworks": {"id": 1}, "current_date": 1}')
+        answer = streaming_module.StreamedAnswer(raw, 3)
+        assert list(answer) == []
+        assert answer.fields['homeworks'] == {'id': 1}
+
+    def test_truncated_answer(self, streaming_module):
+        raw = io.BytesIO(b'{"homeworks": [{"id": 1}, {"id"')
+        with pytest.raises(json.JSONDecodeError):
+            list(streaming_module.StreamedAnswer(raw, 4))
+
+
+class TestStreamingEngine:
+    def test_stream_notifies_changes_in_order(self):
+        import engine as engine_module
+        from tenants import Tenant
+
+        bot = MockBot()
+        tenant = Tenant('token', 1)
+        reversed_answer = {
+            'current_date': ANSWER['current_date'],
+            'homeworks': ANSWER['homeworks'][::-1],
+        }
+        pool = MockPool(lambda url, **kwargs: StreamResponse(reversed_answer))
+        engine = make_engine(
+            engine_module, bot, [tenant], pool=pool, streaming=True
+        )
+
+        async def poll():
+            engine.sender.start()
+            await engine.poll_tenant(tenant)
+            await engine.poll_tenant(tenant)
+            await engine.sender.queue.join()
+            await engine.sender.stop()
+
+        asyncio.run(poll())
+        assert [text.split('"')[1] for _, text in bot.sent] == [
+            f'hw{i}' for i in range(5)
+        ]
+        assert tenant.timestamp == ANSWER['current_date']
+        assert tenant.status == 'approved'
+
+    def test_invalid_current_date_keeps_index(self):
+        import engine as engine_module
+        from tenants import Tenant
+
+        tenant = Tenant('token', 1)
+        answer = {'homeworks': ANSWER['homeworks'], 'current_date': 'now'}
+        pool = MockPool(lambda url, **kwargs: StreamResponse(answer))
+        engine = make_engine(
+            engine_module, MockBot(), [tenant], pool=pool, streaming=True
+        )
+        asyncio.run(engine.poll_tenant(tenant))
+        assert len(engine.index) == 0
+
+    def test_invalid_item_is_skipped(self):
+        import engine as engine_module
+        from tenants import Tenant
+
+        bot = MockBot()
+        tenant = Tenant('token', 1)
+        answer = {
+            'homeworks': [{'id': 0, 'status': 'approved'}]
+            + ANSWER['homeworks'][1:],
+            'current_date': ANSWER['current_date'],
+        }
+        pool = MockPool(lambda url, **kwargs: StreamResponse(answer))
+        engine = make_engine(
+            engine_module, bot, [tenant], pool=pool, streaming=True
+        )
+        asyncio.run(poll_and_send(engine, tenant))
+        assert tenant.timestamp == ANSWER['current_date']
+        assert len(engine.index) == 4
+        assert 'response.homeworks[0].homework_name: missing' in (
+            bot.sent[-1][1]
+        )
@@ -0,0 +1,94 @@
+import asyncio
+import json
+import time
+
+import pytest
+
+from tests.test_engine import FakeResponse, MockBot, MockPool, make_engine
+
+
+@pytest.fixture
+def tracing():
+    import tracing
+    return tracing
+
+
+@pytest.fixture
+def traced(tracing, monkeypatch):
+    buffer = tracing.RingBuffer()
+    monkeypatch.setattr(tracing.TRACER, 'exporter', buffer)
+    monkeypatch.setattr(tracing.TRACER, 'sample_rate', 1.0)
+    monkeypatch.setattr(tracing.TRACER, 'enabled', True)
+    return buffer
+
+
+class TestTracer:
+    def test_spans_nest(self, tracing):
+        buffer = tracing.RingBuffer()
+        tracer = tracing.Tracer(buffer, sample_rate=1.0)
+        with pytest.raises(KeyError):
+            with tracer.span('cycle', chat_id=1):
+                with tracer.span('request') as request:
+                    request.set('http.status_code', 200)
+                    tracing.annotate('payload.bytes', 10)
+                raise KeyError('homeworks')
+        request, cycle = buffer.snapshot()
+        assert cycle['parent_id'] is None
+        assert cycle['error'] == 'KeyError'
+        assert cycle['attributes'] == {'chat_id': 1}
+        assert request['parent_id'] == cycle['span_id']
+        assert request['trace_id'] == cycle['trace_id']
+        assert request['attributes'] == {
+            'http.status_code': 200, 'payload.bytes': 10
+        }
+
+    def test_disabled_tracer_records_nothing(self, tracing):
+        tracer = tracing.Tracer(sample_rate=0)
+        with tracer.span('cycle') as span:
+            assert span is tracing.NOOP
+            assert tracer.start('request') is tracing.NOOP
+        assert tracer.exporter.snapshot() == []
+
+    def test_slow_traces_are_kept(self, tracing):
+        buffer = tracing.RingBuffer()
+        tracer = tracing.Tracer(buffer, sample_rate=0, slow_threshold=0.02)
+        with tracer.span('fast'):
+            pass
+        with tracer.span('slow'):
+            time.sleep(0.03)
+        assert [span['name'] for span in buffer.snapshot()] == ['slow']
+
+    def test_jsonl_export(self, tracing, tmp_path):
+        path = tmp_path / 'spans.jsonl'
+        exporter = tracing.JsonlExporter(path)
+        tracer = tracing.Tracer(exporter, sample_rate=1.0)
+        for name in ('first', 'second'):
+            with tracer.span(name):
+                pass
+        exporter.close()
+        lines = path.read_text().splitlines()
+        assert [json.loads(line)['name'] for line in lines] == [
+            'first', 'second'
+        ]
+
+
+class TestInstrumentation:
+    def test_engine_poll_spans(self, traced):
+        import engine as engine_module
+        from tenants import Tenant
+        answer = {
+            'homeworks': [{'id': 1, 'homework_name': 'hw',
+                           'status': 'approved'}],
+            'current_date': 100,
+        }
+        pool = MockPool(lambda *args, **kwargs: FakeResponse(answer))
+        engine = make_engine(engine_module, MockBot(), [], pool)
+        asyncio.run(engine.poll_tenant(Tenant('token', 7)))
+        spans = {span['name']: span for span in traced.snapshot()}
+        assert set(spans) == {'poll', 'wait', 'request', 'parse'}
+        assert spans['poll']['attributes'] == {'chat_id': 7}
+        assert spans['request']['attributes']['http.status_code'] == 200
+        assert spans['request']['attributes']['payload.bytes'] > 0
+        assert spans['parse']['attributes'] == {'items': 1, 'changed': 1}
+        assert {span['parent_id'] for name, span in spans.items()
+                if name != 'poll'} == {spans['poll']['span_id']}
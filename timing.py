@@ -0,0 +1,56 @@
+import logging
+import math
+import time
+
+from metrics import CYCLE_OVERRUN, MISSED_DEADLINES
+
+
+logger = logging.getLogger(__name__)
+
+
+def next_deadline(previous, period, now):
+    """Returns the next fixed-rate deadline, the overrun and missed slots.
+
+    Deadlines are counted from the previous deadline rather than from the
+    end of the work, so latency does not accumulate into drift. Slots that
+    have already passed are skipped instead of being run back to back.
+    """
+    deadline = previous + period
+    if now <= deadline:
+        return deadline, 0.0, 0
+    overrun = now - deadline
+    missed = int(overrun // period) + 1
+    return deadline + missed * period, overrun, missed
+
+
+class CycleTimer:
+    """Fixed-rate cycle deadlines on the monotonic clock."""
+
+    def __init__(self, period, clock=time.monotonic):
+        """Starts counting deadlines from now."""
+        self.period = period
+        self.clock = clock
+        self.deadline = clock() + period
+        self.overrun = 0.0
+        self.missed = 0
+
+    def tick(self):
+        """Returns whole seconds to sleep until the end of the cycle.
+
+        The delay is rounded up, so the loop never wakes before the
+        deadline; the rounding is not carried over to the next cycle.
+        """
+        now = self.clock()
+        deadline, self.overrun, missed = next_deadline(
+            self.deadline - self.period, self.period, now
+        )
+        CYCLE_OVERRUN.set(self.overrun)
+        if missed:
+            self.missed += missed
+            MISSED_DEADLINES.inc(missed)
+            logger.warning(
+                f'Cycle overran its deadline by {self.overrun:.3f} s, '
+                f'{missed} deadline(s) missed.'
+            )
+        self.deadline = deadline + self.period
+        return math.ceil(deadline - now)
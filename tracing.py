@@ -0,0 +1,231 @@
+import contextvars
+import json
+import random
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from time import perf_counter
+
+from constants import (
+    TRACE_BUFFER_SIZE,
+    TRACE_FILE,
+    TRACE_SAMPLE_RATE,
+    TRACE_SLOW_THRESHOLD,
+)
+
+
+CURRENT = contextvars.ContextVar('span', default=None)
+
+
+def new_id():
+    """Returns a random 64-bit id as hex."""
+    return f'{random.getrandbits(64):016x}'
+
+
+class NoopSpan:
+    """Span of a trace that is not recorded: every call does nothing."""
+
+    __slots__ = ()
+
+    def set(self, key, value):
+        """Ignores the attribute."""
+
+    def fail(self, error):
+        """Ignores the error."""
+
+    def end(self):
+        """Nothing to end."""
+
+
+NOOP = NoopSpan()
+
+
+class Trace:
+    """Spans recorded for one root span until it ends."""
+
+    __slots__ = ('trace_id', 'sampled', 'spans', 'wall', 'clock')
+
+    def __init__(self, sampled):
+        """Starts a trace with a new id."""
+        self.trace_id = new_id()
+        self.sampled = sampled
+        self.spans = []
+        self.wall = time.time()
+        self.clock = perf_counter()
+
+
+class Span:
+    """Timed operation with attributes, part of a trace."""
+
+    __slots__ = ('tracer', 'trace', 'name', 'span_id', 'parent_id',
+                 'started', 'duration', 'attributes', 'error')
+
+    def __init__(self, tracer, trace, name, parent_id, attributes):
+        """Starts a span of `trace` under `parent_id`."""
+        self.tracer = tracer
+        self.trace = trace
+        self.name = name
+        self.span_id = new_id()
+        self.parent_id = parent_id
+        self.attributes = attributes
+        self.error = None
+        self.duration = None
+        self.started = perf_counter()
+
+    def set(self, key, value):
+        """Adds an attribute."""
+        self.attributes[key] = value
+
+    def fail(self, error):
+        """Records the exception class that ended the operation."""
+        self.error = type(error).__name__
+
+    def end(self):
+        """Stops the clock; ending the root span exports the trace."""
+        if self.duration is not None:
+            return
+        self.duration = perf_counter() - self.started
+        self.trace.spans.append(self)
+        if self.parent_id is None:
+            self.tracer.finish(self)
+
+    def as_dict(self):
+        """Returns the span as it is exported."""
+        trace = self.trace
+        return {
+            'trace_id': trace.trace_id,
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'name': self.name,
+            'start': round(trace.wall + self.started - trace.clock, 6),
+            'duration_ms': round(self.duration * 1000, 3),
+            'attributes': self.attributes,
+            'error': self.error,
+        }
+
+
+class RingBuffer:
+    """Keeps the spans of the latest exported traces in memory."""
+
+    def __init__(self, maxlen=TRACE_BUFFER_SIZE):
+        """Creates a buffer for the latest `maxlen` spans."""
+        self.spans = deque(maxlen=maxlen)
+
+    def export(self, spans):
+        """Appends spans, dropping the oldest when full."""
+        self.spans.extend(spans)
+
+    def snapshot(self):
+        """Returns the buffered spans, oldest first."""
+        return list(self.spans)
+
+    def close(self):
+        """Nothing to close."""
+
+
+class JsonlExporter:
+    """Appends spans to a file, one JSON object per line."""
+
+    def __init__(self, path=TRACE_FILE):
+        """Creates an exporter appending to `path`."""
+        self.path = path
+        self.file = None
+        self.lock = threading.Lock()
+
+    def export(self, spans):
+        """Writes the spans of one trace at once."""
+        lines = ''.join(
+            json.dumps(span, ensure_ascii=False) + '\n' for span in spans
+        )
+        with self.lock:
+            if self.file is None:
+                self.file = open(self.path, 'a', encoding='utf-8')
+            self.file.write(lines)
+            self.file.flush()
+
+    def close(self):
+        """Closes the file."""
+        with self.lock:
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+
+
+class Tracer:
+    """Creates spans and exports the traces worth keeping.
+
+    A trace is kept when it is sampled (`sample_rate`, decided when the
+    root span starts) or when its root span took at least
+    `slow_threshold` seconds, so that tail latency is always captured.
+    With neither configured, every span is the shared no-op span.
+
+    The current span is kept in a context variable, so spans nest across
+    function calls, asyncio tasks and `asyncio.to_thread`.
+    """
+
+    def __init__(self, exporter=None, sample_rate=TRACE_SAMPLE_RATE,
+                 slow_threshold=TRACE_SLOW_THRESHOLD):
+        """Creates a tracer exporting sampled and slow traces."""
+        self.exporter = exporter or RingBuffer()
+        self.sample_rate = sample_rate
+        self.slow_threshold = slow_threshold
+        self.enabled = sample_rate > 0 or slow_threshold is not None
+
+    def start(self, name, **attributes):
+        """Starts a span under the current one, or a new trace."""
+        if not self.enabled:
+            return NOOP
+        parent = CURRENT.get()
+        if parent is NOOP:
+            return NOOP
+        if parent is None:
+            sampled = random.random() < self.sample_rate
+            if not sampled and self.slow_threshold is None:
+                return NOOP
+            return Span(self, Trace(sampled), name, None, attributes)
+        return self.child(parent, name, **attributes)
+
+    def child(self, parent, name, **attributes):
+        """Starts a span under `parent` regardless of the current one."""
+        if parent is NOOP:
+            return NOOP
+        return Span(self, parent.trace, name, parent.span_id, attributes)
+
+    def finish(self, root):
+        """Exports a finished trace if it is sampled or slow."""
+        trace = root.trace
+        slow = self.slow_threshold
+        if trace.sampled or (slow is not None and root.duration >= slow):
+            self.exporter.export([span.as_dict() for span in trace.spans])
+
+    @contextmanager
+    def span(self, name, **attributes):
+        """Runs a block as the current span."""
+        span = self.start(name, **attributes)
+        token = CURRENT.set(span)
+        try:
+            yield span
+        except BaseException as error:
+            span.fail(error)
+            raise
+        finally:
+            CURRENT.reset(token)
+            span.end()
+
+
+def current_span():
+    """Returns the current span, the no-op span outside of any."""
+    return CURRENT.get() or NOOP
+
+
+def annotate(key, value):
+    """Adds an attribute to the current span."""
+    span = CURRENT.get()
+    if span is not None:
+        span.set(key, value)
+
+
+TRACER = Tracer(
+    JsonlExporter(TRACE_FILE) if TRACE_FILE else RingBuffer()
+)